@@ -0,0 +1,157 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+from gilda_model import load_model
+
+# NumPy is only needed for batch decoding
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Label bits are transmitted most significant bit first, so they arrive reversed in the word
+REVERSED_BITS = [int(f"{i:08b}"[::-1], 2) for i in range(256)]
+
+# Sign/status matrix value of a negative BCD parameter
+BCD_MINUS = 3
+
+
+def _bcd(value: int) -> int:
+    """Convert a BCD coded value into an integer."""
+    result = 0
+    factor = 1
+    while value > 0:
+        result += (value & 0xF) * factor
+        value >>= 4
+        factor *= 10
+    return result
+
+
+class ArincDecoder:
+    """
+    Decoder of ARINC 429 words driven by the ParameterArinc and ArincDiscretes tables of a GILDA database.
+    Parameters are compiled into a table indexed by the low byte of a word, one per FIFO parameter field.
+    """
+
+    def __init__(self, database_path: str, reverse_labels: bool = True):
+        # Label as stored in the database for each low byte of a word
+        self.labels = [int(f"{(REVERSED_BITS[i] if reverse_labels else i):o}") for i in range(256)]
+        index = {label: i for i, label in enumerate(self.labels)}
+        model = load_model(database_path)
+        # FIFO parameter field names to IDs
+        self.buses = {name: field.id for name, field in model.buses.items()}
+        self.tables = {}
+        for field_id, parameters in model.arinc.items():
+            table = [None] * 256
+            for p in parameters:
+                if p.label not in index:
+                    continue
+                key = index[p.label]
+                if table[key] is None:
+                    table[key] = []
+                # Fido offsets are 1-based bit numbers of the least significant bit
+                table[key].append((
+                    p.name,
+                    p.offset - 1,
+                    (1 << p.length) - 1,
+                    p.type,
+                    p.min is not None and p.min < 0,
+                    p.scale,
+                    p.discretes,
+                ))
+            self.tables[field_id] = table
+
+    def table(self, bus):
+        """Retrieve the label table of a FIFO parameter field, given by name or ID."""
+        return self.tables.get(self.buses.get(bus, bus), [None] * 256)
+
+    def decode(self, word: int, bus):
+        """
+        Decode a single 32-bit word of a FIFO parameter field, given by name or ID.
+        Returns the label, SDI, SSM and parameter values, None when the label is unknown.
+        """
+        ops = self.table(bus)[word & 0xFF]
+        if ops is None:
+            return None
+        ssm = (word >> 29) & 3
+        parameters = {}
+        for name, shift, mask, kind, signed, scale, discretes in ops:
+            value = (word >> shift) & mask
+            if kind == "bcd":
+                value = _bcd(value) * scale
+                if signed and ssm == BCD_MINUS:
+                    value = -value
+            elif kind == "bool":
+                value = bool(value)
+            elif kind == "discrete":
+                if discretes is not None:
+                    value = discretes.get(value, value)
+            else:
+                # Two's complement when the range includes negative values
+                if signed and value > (mask >> 1):
+                    value -= mask + 1
+                value *= scale
+            parameters[name] = value
+        return {"label": self.labels[word & 0xFF], "sdi": (word >> 8) & 3, "ssm": ssm, "parameters": parameters}
+
+    def decode_batch(self, words, bus):
+        """
+        Decode an array of 32-bit words of a FIFO parameter field, given by name or ID, with NumPy.
+        Returns a dictionary of labels with the word indexes, SDI, SSM and one array per parameter.
+        Discrete parameters hold raw values, their names are given in "discretes".
+        """
+        if np is None:
+            raise ImportError("Batch decoding requires NumPy.")
+        table = self.table(bus)
+        words = np.asarray(words, dtype=np.uint32)
+        low = words & 0xFF
+        # Group words by label, indexes stay ascending within a group
+        order = np.argsort(low, kind="stable")
+        keys, first = np.unique(low[order], return_index=True)
+        result = {}
+        for key, index in zip(keys.tolist(), np.split(order, first[1:])):
+            ops = table[key]
+            if ops is None:
+                continue
+            group = words[index]
+            ssm = (group >> 29) & 3
+            columns = {"index": index, "sdi": (group >> 8) & 3, "ssm": ssm, "parameters": {}, "discretes": {}}
+            for name, shift, mask, kind, signed, scale, discretes in ops:
+                value = ((group >> shift) & mask).astype(np.int64)
+                if kind == "bcd":
+                    digits = value
+                    value = np.zeros_like(digits)
+                    factor = 1
+                    while mask > 0:
+                        value += (digits & 0xF) * factor
+                        digits = digits >> 4
+                        mask >>= 4
+                        factor *= 10
+                    value = value * scale
+                    if signed:
+                        value = np.where(ssm == BCD_MINUS, -value, value)
+                elif kind == "bool":
+                    value = value.astype(bool)
+                elif kind == "discrete":
+                    columns["discretes"][name] = discretes
+                else:
+                    if signed:
+                        value = np.where(value > (mask >> 1), value - (mask + 1), value)
+                    value = value * scale
+                columns["parameters"][name] = value
+            result[self.labels[key]] = columns
+        return result
@@ -15,21 +15,154 @@
 # You should have received a copy of the GNU General Public License
 # along with GILDA parser. If not, see http://www.gnu.org/licenses/.
 #
+import os
+import re
 import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Sortable columns of the data structures page, by API name
+STRUCTURE_SORT = {
+    "id": "ds.Id",
+    "name": "ds.EngName",
+    "channel": "ds.Channel",
+    "source": "pl.Name",
+}
+
+# API names of the ViewParameterFields columns
+FIELD_COLUMNS = ("id", "name", "ref_eng_name", "size", "offset", "type", "source", "structure", "channel", "unit",
+                 "description", "min", "max", "low_bit", "high_bit", "comment")
+
+# API names of the ARINC parameter columns, as in ViewParameterArinc
+ARINC_COLUMNS = ("label", "name", "description", "bus", "type", "offset", "length", "unit", "min", "max",
+                 "scale_factor")
+
+# Number of query results kept in memory
+CACHE_SIZE = 256
+
+# Matches of a search table are counted and ranked up to this number, beyond it they are returned in index order
+SEARCH_RANK_LIMIT = 1000
+
+# Search tables with the query of their result rows, the hits are ranked or ordered by the caller
+SEARCH_QUERIES = {
+    "fields": (
+        "SearchParameterFields",
+        """SELECT pf.Id, pf.Name, pf.RefEngName, pf.Description, ds.Id, ds.EngName FROM hits
+         JOIN ParameterFields pf ON pf.Id = hits.rowid
+         LEFT JOIN DataStructures ds ON pf.DataStructure = ds.Id""",
+        ("id", "name", "ref_eng_name", "description", "structure_id", "structure"),
+    ),
+    "enums": (
+        "SearchEnumDefinitions",
+        """SELECT d.Id, d.Definition, d.Comment FROM hits
+         JOIN ParameterEnumDefinitions d ON d.Id = hits.rowid""",
+        ("id", "definition", "comment"),
+    ),
+    "arinc": (
+        "SearchParameterArinc",
+        """SELECT s.Label, s.Name, s.Description, s.ParameterFieldsId, pf.RefEngName FROM hits
+         JOIN SearchParameterArinc s ON s.rowid = hits.rowid
+         LEFT JOIN ParameterFields pf ON pf.Id = s.ParameterFieldsId""",
+        ("label", "name", "description", "field_id", "bus"),
+    ),
+}
+
+
+def search_expression(text: str) -> str:
+    """
+    Convert user input into an FTS5 query, None if it holds no searchable word.
+    Every word must match as prefix, punctuation splits words like the FTS5 tokenizer does.
+    """
+    terms = []
+    for word in text.split():
+        tokens = re.findall(r"[^\W_]+", word)
+        if tokens:
+            terms.append(f'"{" ".join(tokens)}"*')
+    return " AND ".join(terms) if terms else None
+
+
+class QueryCache:
+    """LRU cache of query results keyed by (database, mtime, query, params)."""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return a cached result, None if not cached."""
+        with self.lock:
+            result = self.results.get(key)
+            if result is not None:
+                self.results.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        """Cache a result, dropping the least recently used one when full."""
+        with self.lock:
+            self.results[key] = result
+            self.results.move_to_end(key)
+            if len(self.results) > self.size:
+                self.results.popitem(last=False)
+
+    def invalidate(self, path):
+        """Drop all results of a database."""
+        with self.lock:
+            for key in [k for k in self.results if k[0] == path]:
+                del self.results[key]
+
+
+class ConnectionPool:
+    """
+    Read-only connections shared by all requests, keyed by database path.
+    Connections are opened as immutable and dropped with the cached results when the file changes.
+    """
+
+    def __init__(self, cache: QueryCache):
+        self.cache = cache
+        self.idle = {}
+        self.mtimes = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, path: str, mtime: int):
+        """Return an idle connection of a database or open a new one."""
+        with self.lock:
+            if self.mtimes.get(path) != mtime:
+                # Immutable connections do not see changes of the file
+                for connection in self.idle.pop(path, []):
+                    connection.close()
+                self.cache.invalidate(path)
+                self.mtimes[path] = mtime
+            idle = self.idle.get(path)
+            if idle:
+                return idle.pop()
+        return sqlite3.connect(f"{Path(path).as_uri()}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+
+    def release(self, path: str, mtime: int, connection):
+        """Return a connection to the pool, or close it if the database changed meanwhile."""
+        with self.lock:
+            if self.mtimes.get(path) == mtime:
+                self.idle.setdefault(path, []).append(connection)
+                return
+        connection.close()
+
+
+# Process wide query cache and connection pool
+cache = QueryCache()
+pool = ConnectionPool(cache)
 
 
 class Database:
     """Database connection and operations for GILDA viewer backend."""
 
     def __init__(self, database_path):
-        # Connect to database
+        # Take a read-only connection from the pool
         try:
-            self.database = sqlite3.connect(
-                database_path, isolation_level="DEFERRED")
+            self.path = str(Path(database_path).resolve())
+            self.mtime = os.stat(self.path).st_mtime_ns
+            self.database = pool.acquire(self.path, self.mtime)
             self.cursor = self.database.cursor()
-            self.database.execute("PRAGMA journal_mode = TRUNCATE;")
-            self.database.execute("PRAGMA foreign_keys = ON;")
-            self.database.commit()
         except Exception as e:
             print("Connecting database failed.")
             print(f"Error was: {e}")
@@ -39,18 +172,146 @@ class Database:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.cursor.close()
-        self.database.close()
+        pool.release(self.path, self.mtime, self.database)
 
     def close(self):
-        """Close the database connection."""
+        """Return the database connection to the pool."""
         self.__exit__(None, None, None)
 
-    def view_data_structures(self):
-        """Retrieve all data structures from the database."""
-        row = self.cursor.execute("SELECT * FROM ViewDataStructures;")
-        return [
+    def query(self, sql: str, params=()):
+        """Run a query and return all rows, served from the cache until the database file changes."""
+        key = (self.path, self.mtime, sql,
+               tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params))
+        rows = cache.get(key)
+        if rows is None:
+            rows = self.cursor.execute(sql, params).fetchall()
+            cache.put(key, rows)
+        return rows
+
+    def structure(self, structure_id: int):
+        """Retrieve a data structure with its parameter fields ordered by offset, None if it does not exist."""
+        rows = self.query(
+            """SELECT ds.Id, ds.EngName, pl.Name, ds.Channel FROM DataStructures ds
+             LEFT JOIN PartitionList pl ON ds.SourcePartition = pl.Id WHERE ds.Id = :id;""",
+            {"id": structure_id},
+        )
+        if len(rows) == 0:
+            return None
+        structure = dict(zip(("id", "name", "source", "channel"), rows[0]))
+        # EngName is unique, the view is searched through its index
+        rows = self.query(
+            "SELECT * FROM ViewParameterFields WHERE DataStructure = :name ORDER BY Offset, Id;",
+            {"name": structure["name"]},
+        )
+        structure["fields"] = [dict(zip(FIELD_COLUMNS, r)) for r in rows]
+        return structure
+
+    def field(self, field_id: int):
+        """
+        Retrieve a parameter field with its enum values and, for FIFO fields, ARINC parameters and discretes.
+        Returns None if the field does not exist.
+        """
+        rows = self.query("SELECT * FROM ViewParameterFields WHERE Id = :id;", {"id": field_id})
+        if len(rows) == 0:
+            return None
+        field = dict(zip(FIELD_COLUMNS, rows[0]))
+        rows = self.query(
+            "SELECT Value, Definition, Comment FROM ViewParameterEnumValues WHERE ParameterField = :id ORDER BY Value;",
+            {"id": field_id},
+        )
+        field["enums"] = [dict(zip(("value", "definition", "comment"), r)) for r in rows]
+
+        discretes = {}
+        rows = self.query(
+            """SELECT Label, Offset, Value, Name FROM ArincDiscretes WHERE ParameterFieldsId = :id
+             ORDER BY Label, Offset, Value;""",
+            {"id": field_id},
+        )
+        for label, offset, value, name in rows:
+            discretes.setdefault((label, offset), []).append({"value": value, "name": name})
+        # ViewParameterArinc has no field ID, its query is repeated on the indexed ParameterFieldsId
+        rows = self.query(
+            """SELECT pa.Label, pa.Name, pa.Description, pf.RefEngName, pt.Type, pa.Offset, pa.Length, pu.Unit,
+             pa.Min, pa.Max, pa.ScaleFactor
+             FROM ParameterArinc pa
+             LEFT JOIN ParameterFields pf ON pa.ParameterFieldsId = pf.Id
+             LEFT JOIN ParameterTypes pt ON pa.Type = pt.Id
+             LEFT JOIN ParameterUnits pu ON pa.Unit = pu.Id
+             WHERE pa.ParameterFieldsId = :id ORDER BY pa.Label, pa.Offset;""",
+            {"id": field_id},
+        )
+        field["arinc"] = []
+        for r in rows:
+            parameter = dict(zip(ARINC_COLUMNS, r))
+            parameter["discretes"] = discretes.get((parameter["label"], parameter["offset"]), [])
+            field["arinc"].append(parameter)
+        return field
+
+    def has_search_index(self) -> bool:
+        """Check if the database was imported with full-text search tables."""
+        names = [f"'{table}'" for table, _query, _columns in SEARCH_QUERIES.values()]
+        rows = self.query(f"SELECT COUNT(*) FROM sqlite_master WHERE name IN ({', '.join(names)});")
+        return rows[0][0] == len(names)
+
+    def search(self, expression: str, limit: int):
+        """
+        Search parameter fields, enum definitions and ARINC parameters with an FTS5 query expression.
+        Returns per group the total number of matches, whether they are ranked and the first rows.
+        The total is None for more than SEARCH_RANK_LIMIT matches.
+        """
+        result = {}
+        for group, (table, select, columns) in SEARCH_QUERIES.items():
+            params = {"query": expression, "limit": limit, "count": SEARCH_RANK_LIMIT + 1}
+            total = self.query(
+                f"SELECT COUNT(*) FROM (SELECT rowid FROM {table} WHERE {table} MATCH :query LIMIT :count);",
+                params,
+            )[0][0]
+            # Ranking costs time with every match, broad prefixes are returned in index order
+            ranked = total <= SEARCH_RANK_LIMIT
+            hits = f"SELECT rowid, rank FROM {table} WHERE {table} MATCH :query ORDER BY rank LIMIT :limit"
+            if ranked is False:
+                hits = f"SELECT rowid FROM {table} WHERE {table} MATCH :query ORDER BY rowid LIMIT :limit"
+            rows = self.query(f"WITH hits AS ({hits}) {select} ORDER BY hits.{'rank' if ranked else 'rowid'};",
+                              params)
+            result[group] = {
+                "total": total if ranked else None,
+                "ranked": ranked,
+                "rows": [dict(zip(columns, r)) for r in rows],
+            }
+        return result
+
+    def page_data_structures(self, offset: int, limit: int, sort: str = "name", descending: bool = False,
+                             name: str = None, channel: int = None, source: str = None):
+        """
+        Retrieve one page of data structures and the total number of structures matching the filters.
+        Names match by case-insensitive prefix, channel and source partition exactly.
+        """
+        where = []
+        params = {"offset": offset, "limit": limit}
+        if name:
+            # Prefix LIKE uses the NOCASE index of EngName, wildcards in the filter are escaped
+            where.append("ds.EngName LIKE :name ESCAPE '\\'")
+            params["name"] = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        if channel is not None:
+            where.append("ds.Channel = :channel")
+            params["channel"] = channel
+        if source:
+            where.append("pl.Name = :source")
+            params["source"] = source
+        where = f"WHERE {' AND '.join(where)}" if len(where) > 0 else ""
+        tables = "FROM DataStructures ds LEFT JOIN PartitionList pl ON ds.SourcePartition = pl.Id"
+
+        total = self.query(f"SELECT COUNT(*) {tables} {where};", params)[0][0]
+        rows = self.query(
+            f"""SELECT ds.Id, ds.EngName, pl.Name, ds.Channel {tables} {where}
+             ORDER BY {STRUCTURE_SORT[sort]} {'DESC' if descending else 'ASC'}, ds.Id
+             LIMIT :limit OFFSET :offset;""",
+            params,
+        )
+        rows = [
             {"id": r[0],
              "name": r[1],
              "source": r[2],
-             "channel": r[3]} for r in row.fetchall()
-            ]
\ No newline at end of file
+             "channel": r[3]} for r in rows
+        ]
+        return total, rows
@@ -22,21 +22,37 @@
 # https://www.geeksforgeeks.org/python/python-build-a-rest-api-using-flask/
 # https://wpdatatables.com/datatables-alternative/
 #
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, current_app, render_template, jsonify, request
 from flask_restful import Resource, Api
 import argparse
+import gzip
 import json
 import os
 import signal
 import sys
-from database import Database
+from database import STRUCTURE_SORT, Database, search_expression
+from datetime import datetime, timezone
 from pathlib import Path
 
+# Brotli is optional, responses are gzip compressed without it
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 __author__ = "Michael Wolf aka Mictronics"
 __copyright__ = "2025, (C) Michael Wolf"
 __license__ = "GPL v3+"
 __version__ = "1.0.0"
 
+# Frontend build output, relative to the backend directory
+FRONTEND_DIST = "../frontend/dist"
+
+# JSON responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
 
 def initArgParser(parser=None):
     """Initialize the command line argument parsing."""
@@ -53,6 +69,14 @@ def initArgParser(parser=None):
             type=str,
         )
 
+        parser.add_argument(
+            "--config",
+            metavar="CONFIG_FILE",
+            help="Flask configuration file relative to the backend directory. Default 'gilda_viewer_config.json'.",
+            default="gilda_viewer_config.json",
+            type=str,
+        )
+
         parser.set_defaults(deprecated=None)
         parser.add_argument("--version", action="version",
                             version=f"{__version__}")
@@ -65,6 +89,48 @@ def initArgParser(parser=None):
     return args
 
 
+def database_response(database, build, missing="Not found."):
+    """
+    Answer with 304 if the client holds the current version of the database, else with the JSON returned by build.
+    A build result of None answers 404 with the missing message. ETag and Last-Modified are derived from the
+    database file, so a response stays valid until the next import.
+    """
+    stat = os.stat(database)
+    response = current_app.response_class(mimetype="application/json")
+    # Weak, the body differs by content encoding
+    response.set_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}", weak=True)
+    response.last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+    # Stored by browsers and proxies, but revalidated on every use
+    response.cache_control.no_cache = True
+    response.vary.add("Accept-Encoding")
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    data = build()
+    if data is None:
+        return missing, 404
+    response.set_data(current_app.json.dumps(data))
+    return response
+
+
+def compress_response(response):
+    """Compress JSON responses with brotli or gzip, as accepted by the client."""
+    if response.mimetype != "application/json" or response.direct_passthrough or response.status_code != 200:
+        return response
+    if "Content-Encoding" in response.headers or (response.content_length or 0) < COMPRESS_MIN_SIZE:
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(["br", "gzip"] if brotli is not None else ["gzip"])
+    if encoding == "br":
+        response.set_data(brotli.compress(response.get_data(), quality=BROTLI_QUALITY))
+    elif encoding == "gzip":
+        response.set_data(gzip.compress(response.get_data(), compresslevel=GZIP_LEVEL))
+    else:
+        return response
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
 class GetDatabases(Resource):
     """Return available database files to frontend"""
     def __init__(self, db_files):
@@ -75,20 +141,154 @@ class GetDatabases(Resource):
         return jsonify(databases)
 
 
-class LoadDatabase(Resource):
-    """Load and return selected database to frontend"""
-    def put(self):
-        if Path(request.json['database']).is_file() is False:
-            return "Database file not found.", 404
-        try: 
-            with Database(request.json['database']) as db:
-                data = db.view_data_structures()
-            return jsonify(data)
-        
+class DataStructures(Resource):
+    """Return one page of data structures, sorted and filtered by the database"""
+    def __init__(self, db_files):
+        self.db_files = db_files
+
+    def get(self):
+        database = request.args.get('database', '')
+        # Only databases found in the input path can be queried
+        if database not in self.db_files.values():
+            return "Database not found.", 404
+        try:
+            page = int(request.args.get('page', 0))
+            size = int(request.args.get('size', 50))
+            channel = request.args.get('channel')
+            channel = int(channel) if channel not in (None, '') else None
+        except ValueError:
+            return "Page, size and channel must be integers.", 400
+        sort = request.args.get('sort', 'name')
+        order = request.args.get('order', 'asc')
+        if page < 0 or size < 1 or size > 500:
+            return "Page must not be negative, size must be 1 to 500.", 400
+        if sort not in STRUCTURE_SORT or order not in ('asc', 'desc'):
+            return f"Sort must be one of {', '.join(STRUCTURE_SORT)}, order asc or desc.", 400
+
+        def build():
+            with Database(database) as db:
+                total, rows = db.page_data_structures(
+                    page * size, size, sort, order == 'desc',
+                    request.args.get('name'), channel, request.args.get('source'))
+            return {"total": total, "page": page, "size": size, "rows": rows}
+
+        try:
+            return database_response(database, build)
+
+        except Exception as e:
+            return f"{e}", 500
+
+
+class Search(Resource):
+    """Return ranked full-text search results of parameter fields, enum definitions and ARINC parameters"""
+    def __init__(self, db_files):
+        self.db_files = db_files
+
+    def get(self):
+        database = request.args.get('database', '')
+        # Only databases found in the input path can be queried
+        if database not in self.db_files.values():
+            return "Database not found.", 404
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return "Limit must be an integer.", 400
+        if limit < 1 or limit > 100:
+            return "Limit must be 1 to 100.", 400
+        expression = search_expression(request.args.get('q', ''))
+        if expression is None:
+            return "Search text must contain a letter or digit.", 400
+
+        def build():
+            with Database(database) as db:
+                if db.has_search_index() is False:
+                    return None
+                return {"query": expression, **db.search(expression, limit)}
+
+        try:
+            return database_response(database, build, "Search index not found, import the database again.")
+
+        except Exception as e:
+            return f"{e}", 500
+
+
+class StructureDetail(Resource):
+    """Return a data structure with its parameter fields"""
+    def __init__(self, db_files):
+        self.db_files = db_files
+
+    def get(self, structure_id):
+        database = request.args.get('database', '')
+        # Only databases found in the input path can be queried
+        if database not in self.db_files.values():
+            return "Database not found.", 404
+
+        def build():
+            with Database(database) as db:
+                return db.structure(structure_id)
+
+        try:
+            return database_response(database, build, "Data structure not found.")
+
+        except Exception as e:
+            return f"{e}", 500
+
+
+class FieldDetail(Resource):
+    """Return a parameter field with its enum values, ARINC parameters and discretes"""
+    def __init__(self, db_files):
+        self.db_files = db_files
+
+    def get(self, field_id):
+        database = request.args.get('database', '')
+        # Only databases found in the input path can be queried
+        if database not in self.db_files.values():
+            return "Database not found.", 404
+
+        def build():
+            with Database(database) as db:
+                return db.field(field_id)
+
+        try:
+            return database_response(database, build, "Parameter field not found.")
+
         except Exception as e:
             return f"{e}", 500
 
 
+def find_databases(input_path):
+    """Find database files in the input path, returns a mapping of names to paths."""
+    db_files = {}
+    for root, _dirs, files in os.walk(input_path):
+        for file in files:
+            if file.endswith((".sqlite", "sqlite3", ".db")):
+                file_path = os.path.join(root, file)
+                db_files[Path(file_path).stem] = file_path
+    return db_files
+
+
+def create_app(input_path, config_file="gilda_viewer_config.json"):
+    """Create the viewer application for the databases found in the input path."""
+    db_files = find_databases(input_path)
+
+    # The built frontend is served as template and static files
+    app = Flask(__name__, template_folder=FRONTEND_DIST, static_folder=FRONTEND_DIST, static_url_path='')
+    app.config.from_file(config_file, load=json.load)
+    api = Api(app, prefix="/api/v1")
+    api.add_resource(GetDatabases, '/databases', resource_class_args=[db_files])
+    api.add_resource(DataStructures, '/structures', resource_class_args=[db_files])
+    api.add_resource(Search, '/search', resource_class_args=[db_files])
+    api.add_resource(StructureDetail, '/structures/<int:structure_id>', resource_class_args=[db_files])
+    api.add_resource(FieldDetail, '/fields/<int:field_id>', resource_class_args=[db_files])
+    app.after_request(compress_response)
+
+    @app.route('/', methods=['GET'])
+    def index():
+        return render_template('index.html')
+
+    return app
+
+
 def main():
     """Main program function"""
     # Setup signal handlers for graceful termination
@@ -111,24 +311,8 @@ def main():
         parser.print_help()
         sys.exit(1)  # Exit with error when argument parsing fails
 
-    db_files = {}
-
-    for root, _dirs, files in os.walk(args.input):
-        for file in files:
-            if file.endswith((".sqlite", "sqlite3", ".db")):
-                file_path = os.path.join(root, file)
-                db_files[Path(file_path).stem] = file_path
-
-    app = Flask(__name__,template_folder='../frontend/dist')
-    api = Api(app, prefix="/api/v1")
-    api.add_resource(GetDatabases, '/databases', resource_class_args=[db_files])
-    api.add_resource(LoadDatabase, '/load')
-
-    @app.route('/', methods=['GET'])
-    def index():
-        return render_template('index.html')
-
-    app.config.from_file("gilda_viewer_config.json", load=json.load)
+    # Development server, see wsgi.py for production serving
+    app = create_app(args.input, args.config)
     app.run()
 
 
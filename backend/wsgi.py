@@ -0,0 +1,27 @@
+# This file is part of the GILDA viewer.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+# Production entry point of the GILDA viewer, e.g.
+# GILDA_VIEWER_INPUT=/data/gilda gunicorn --chdir backend --workers 4 --threads 4 wsgi:app
+#
+import os
+from gilda_viewer import create_app
+
+app = create_app(
+    os.environ.get("GILDA_VIEWER_INPUT", "."),
+    os.environ.get("GILDA_VIEWER_CONFIG", "gilda_viewer_production.json"),
+)
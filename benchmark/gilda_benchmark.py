@@ -0,0 +1,188 @@
+#!python3
+
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from gilda_export_generator import generate
+
+__author__ = "Michael Wolf aka Mictronics"
+__copyright__ = "2025, (C) Michael Wolf"
+__license__ = "GPL v3+"
+__version__ = "1.0.0"
+
+GILDA_PARSER = Path(__file__).resolve().parent.parent / "gilda_parser.py"
+
+
+def initArgParser(parser=None):
+    """Initialize the command line argument parsing."""
+    if parser is None:
+        return None
+
+    try:
+        # Positional arguments
+        parser.add_argument(
+            "report",
+            help="Output JSON report file.",
+            default=None,
+            nargs="?",
+            type=str,
+        )
+        # Optional arguments
+        parser.add_argument("--files", help="Number of structure XML files. Default 10.", default=10, type=int)
+        parser.add_argument("--structures", help="Structures per XML file. Default 50.", default=50, type=int)
+        parser.add_argument("--fields", help="Fields per structure. Default 20.", default=20, type=int)
+        parser.add_argument("--enums", help="Enum values per enumerated field. Default 4.", default=4, type=int)
+        parser.add_argument("--fido", help="Number of ARINC fido files. Default 2.", default=2, type=int)
+        parser.add_argument("--labels", help="ARINC labels per fido file. Default 50.", default=50, type=int)
+        parser.add_argument("--repeat", help="Number of import runs. Default 1.", default=1, type=int)
+        parser.add_argument(
+            "--export",
+            metavar="PATH",
+            help="Use an existing GILDA export instead of generating one.",
+            default=None,
+            type=str,
+        )
+        parser.set_defaults(deprecated=None)
+        parser.add_argument("--version", action="version",
+                            version=f"{__version__}")
+        # Arguments after "--" are passed on to gilda_parser.py, e.g. -- --bulk --jobs 4
+        argv = sys.argv[1:]
+        parser_args = []
+        if "--" in argv:
+            split = argv.index("--")
+            argv, parser_args = argv[:split], argv[split + 1:]
+        args = parser.parse_args(argv)
+        args.parser_args = parser_args
+
+    except Exception as e:
+        print(f"Error initializing argument parser: {e}")
+        return None
+
+    return args
+
+
+def count_rows(database_path):
+    """Count imported rows of the main tables."""
+    with sqlite3.connect(database_path) as db:
+        return {
+            table: db.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+            for table in ("DataStructures", "ParameterFields", "ParameterEnumValues", "ParameterArinc", "ArincDiscretes")
+        }
+
+
+def run_import(export_path, database_path, parser_args):
+    """Create an empty database, import the export and return the measured run."""
+    subprocess.run([sys.executable, GILDA_PARSER, "--create", database_path], check=True)
+    command = [sys.executable, GILDA_PARSER, "-s", "-a", "ARINC.conf", *parser_args, export_path, database_path]
+    start = time.perf_counter()
+    process = subprocess.Popen(command)
+    # wait4() reports the resources of this child only
+    _pid, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    rows = count_rows(database_path)
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = usage.ru_maxrss * 1024 if platform.system() == "Linux" else usage.ru_maxrss
+    return {
+        "exit_code": process.returncode,
+        "seconds": elapsed,
+        "peak_rss_bytes": peak_rss,
+        "database_bytes": os.path.getsize(database_path),
+        "rows": rows,
+    }
+
+
+def main():
+    """Main program function"""
+    parser = argparse.ArgumentParser(
+        prog="gilda_benchmark",
+        description="Measure GILDA import throughput on a synthetic or existing export.",
+        epilog="License GPL-3+ (C) 2025 Michael Wolf, www.mictronics.de",
+        usage="%(prog)s [options] report [-- gilda_parser arguments]",
+    )
+    args = initArgParser(parser)
+    if args is None or args.report is None:
+        print("Output report file must be specified.")
+        parser.print_help()
+        sys.exit(1)
+    parser_args = args.parser_args
+
+    with tempfile.TemporaryDirectory(prefix="gilda_benchmark_") as tmp:
+        export_path = args.export
+        if export_path is None:
+            export_path = os.path.join(tmp, "export")
+            generate(export_path, args.files, args.structures, args.fields, args.enums, args.fido, args.labels)
+        # Structure files only, like the XML stage of gilda_parser.py
+        xml_files = sum(
+            1 for _root, _dirs, files in os.walk(export_path)
+            for f in files if f.endswith((".XML", ".xml")) and f.lower() != "channels.xml"
+        )
+
+        runs = []
+        for _run in range(args.repeat):
+            result = run_import(export_path, os.path.join(tmp, "benchmark.sqlite"), parser_args)
+            result["files_per_second"] = xml_files / result["seconds"]
+            result["fields_per_second"] = result["rows"]["ParameterFields"] / result["seconds"]
+            runs.append(result)
+            if result["exit_code"] != 0:
+                print(f"Import failed with exit code {result['exit_code']}.")
+            print(
+                f"{result['seconds']:.2f} s, {result['files_per_second']:.1f} files/s, "
+                f"{result['fields_per_second']:.0f} fields/s, peak RSS {result['peak_rss_bytes'] >> 20} MB, "
+                f"database {result['database_bytes'] >> 10} kB"
+            )
+
+    parser_version = subprocess.run(
+        [sys.executable, GILDA_PARSER, "--version"], capture_output=True, text=True
+    ).stdout.strip()
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "gilda_parser_version": parser_version,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "parser_args": parser_args,
+        "export": args.export if args.export is not None else {
+            "files": args.files,
+            "structures": args.structures,
+            "fields": args.fields,
+            "enums": args.enums,
+            "fido": args.fido,
+            "labels": args.labels,
+        },
+        "xml_files": xml_files,
+        "runs": runs,
+        "best_seconds": min(r["seconds"] for r in runs),
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    # Failed imports are reported, but the benchmark fails as well
+    sys.exit(1 if any(r["exit_code"] != 0 for r in runs) else 0)
+
+
+if __name__ == "__main__":
+    main()
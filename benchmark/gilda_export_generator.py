@@ -0,0 +1,187 @@
+#!python3
+
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import argparse
+import os
+import sys
+
+__author__ = "Michael Wolf aka Mictronics"
+__copyright__ = "2025, (C) Michael Wolf"
+__license__ = "GPL v3+"
+__version__ = "1.0.0"
+
+# Partitions and equipment known to create_gilda_database.sql
+PARTITIONS = ("AFCS", "BSP", "DMS", "HMI", "IO", "MAIN")
+DIRECTIONS = ("FromPartition", "ToPartition", "InterPartition")
+
+
+def initArgParser(parser=None):
+    """Initialize the command line argument parsing."""
+    if parser is None:
+        return None
+
+    try:
+        # Positional arguments
+        parser.add_argument(
+            "output",
+            help="Output path for the synthetic GILDA export.",
+            default=None,
+            nargs="?",
+            type=str,
+        )
+        # Optional arguments
+        parser.add_argument("--files", help="Number of structure XML files. Default 10.", default=10, type=int)
+        parser.add_argument("--structures", help="Structures per XML file. Default 50.", default=50, type=int)
+        parser.add_argument("--fields", help="Fields per structure. Default 20.", default=20, type=int)
+        parser.add_argument("--enums", help="Enum values per enumerated field. Default 4.", default=4, type=int)
+        parser.add_argument("--fido", help="Number of ARINC fido files. Default 2.", default=2, type=int)
+        parser.add_argument("--labels", help="ARINC labels per fido file. Default 50.", default=50, type=int)
+
+        parser.set_defaults(deprecated=None)
+        parser.add_argument("--version", action="version",
+                            version=f"{__version__}")
+        args = parser.parse_args()
+
+    except Exception as e:
+        print(f"Error initializing argument parser: {e}")
+        return None
+
+    return args
+
+
+def structure_name(file, structure):
+    """Return the engineering name of a synthetic data structure."""
+    return f"STRUCT_{file:04d}_{structure:04d}"
+
+
+def write_channels(path, files, structures):
+    """Write Channels.xml with one channel per data structure."""
+    with open(os.path.join(path, "Channels.xml"), "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<Channels>\n')
+        f.write('  <Equipment_Channels Name="AMC">\n    <Module Name="ChA">\n')
+        channel = 0
+        for file in range(files):
+            for structure in range(structures):
+                channel += 1
+                f.write(
+                    f'      <{DIRECTIONS[channel % 3]} ChannelName="CH_{channel}" '
+                    f'Description="{structure_name(file, structure)}"/>\n'
+                )
+        f.write("    </Module>\n  </Equipment_Channels>\n</Channels>\n")
+
+
+def write_structures(path, file, structures, fields, enums, fifo_buses):
+    """
+    Write one structure XML file.
+    Every third field is enumerated, fields linked to a FIFO bus refer to the ARINC fido files.
+    """
+    with open(os.path.join(path, f"GILDA_{file:04d}.xml"), "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<GILDA>\n')
+        for structure in range(structures):
+            name = structure_name(file, structure)
+            partition = PARTITIONS[(file + structure) % len(PARTITIONS)]
+            f.write(f'  <Structure EngName="{name}" EmittedByPartition="{partition}">\n')
+            for field in range(fields):
+                f.write(
+                    f'    <Field Name="{name}_F{field:04d}" Size="4" Offset="{field * 4}" '
+                    f'Description="Synthetic field {field}">\n'
+                )
+                if field % 4 == 1:
+                    f.write(f'      <BitField LowBit="0" HighBit="{field % 32}"/>\n')
+                if field % 3 == 0:
+                    for value in range(enums):
+                        f.write(
+                            f'      <Enumerate Value="{value:08b}" Definition="STATE_{value}_{field % 16}" '
+                            f'Comments="Synthetic state {value}"/>\n'
+                        )
+                elif len(fifo_buses) > 0 and field % 3 == 1 and structure == 0 and file < len(fifo_buses):
+                    f.write(f'      <NonEnumerate Type="fifo" Unit="unitless" RefEngName="{fifo_buses[file]}"/>\n')
+                else:
+                    f.write(
+                        f'      <NonEnumerate Type="uint{8 << (field % 3)}" Unit="UNIT_{field % 8}" '
+                        f'RefEngName="{name}_R{field:04d}">\n'
+                        f'        <UsageDomain Min="0" Max="{field * 100}"/>\n'
+                        "      </NonEnumerate>\n"
+                    )
+                f.write("    </Field>\n")
+            f.write("  </Structure>\n")
+        f.write("</GILDA>\n")
+
+
+def fido_line(columns):
+    """Join fido columns with the fido separator."""
+    parts = [""] * 18
+    for index, value in columns.items():
+        parts[index] = value
+    return "!".join(parts) + "!\n"
+
+
+def write_arinc(path, fido_buses, labels):
+    """Write ARINC.conf and one fido file per FIFO bus."""
+    with open(os.path.join(path, "ARINC.conf"), "w", encoding="utf-8") as f:
+        f.write("# Synthetic ARINC configuration\n")
+        for bus in fido_buses:
+            f.write(f"| {bus} | RX | {bus}.fido |\n")
+    for bus in fido_buses:
+        with open(os.path.join(path, f"{bus}.fido"), "w", encoding="utf-8") as f:
+            f.write(fido_line({0: "#", 9: "NAME", 10: "DESCRIPTION"}))
+            for label in range(labels):
+                # Octal label of a BNR parameter and a discrete parameter within the same word
+                f.write(fido_line({
+                    0: "*", 3: f"{label % 8 + (label // 8 % 8) * 10 + 100}", 9: f"{bus}_P{label:03d}",
+                    10: f"Synthetic parameter {label}", 11: "BNR", 12: "16", 13: "11", 14: "FT",
+                    15: "-4096 4096", 16: "0.125",
+                }))
+                f.write(fido_line({
+                    9: f"{bus}_D{label:03d}", 10: f"Synthetic status {label}", 11: "DIS", 12: "2",
+                    13: "27", 14: "S.U.", 15: "0 3", 16: "1",
+                }))
+                for value in range(4):
+                    f.write(fido_line({10: f"{value:02b} STATE_{value}"}))
+
+
+def generate(path, files=10, structures=50, fields=20, enums=4, fido=2, labels=50):
+    """Generate a synthetic GILDA export in path."""
+    os.makedirs(path, exist_ok=True)
+    fido_buses = [f"BUS_{bus:02d}" for bus in range(fido)]
+    write_channels(path, files, structures)
+    for file in range(files):
+        write_structures(path, file, structures, fields, enums, fido_buses)
+    write_arinc(path, fido_buses, labels)
+
+
+def main():
+    """Main program function"""
+    parser = argparse.ArgumentParser(
+        prog="gilda_export_generator",
+        description="Generate a synthetic GILDA export for benchmarks.",
+        epilog="License GPL-3+ (C) 2025 Michael Wolf, www.mictronics.de",
+    )
+    args = initArgParser(parser)
+    if args is None or args.output is None:
+        print("Output path must be specified.")
+        parser.print_help()
+        sys.exit(1)
+
+    generate(args.output, args.files, args.structures, args.fields, args.enums, args.fido, args.labels)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!python3
+
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+from pathlib import Path
+
+__author__ = "Michael Wolf aka Mictronics"
+__copyright__ = "2025, (C) Michael Wolf"
+__license__ = "GPL v3+"
+__version__ = "1.0.0"
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+
+def initArgParser(parser=None):
+    """Initialize the command line argument parsing."""
+    if parser is None:
+        return None
+
+    try:
+        # Positional arguments
+        parser.add_argument(
+            "input",
+            help="Input path that contains GILDA SQlite database files.",
+            default=None,
+            nargs="?",
+            type=str,
+        )
+        # Optional arguments
+        parser.add_argument(
+            "--workers",
+            help="Gunicorn worker counts to measure. Default 1 4 8.",
+            default=[1, 4, 8],
+            nargs="+",
+            type=int,
+        )
+        parser.add_argument("--threads", help="Threads per worker. Default 4.", default=4, type=int)
+        parser.add_argument("--clients", help="Concurrent client connections. Default 16.", default=16, type=int)
+        parser.add_argument("--duration", help="Seconds of load per worker count. Default 10.", default=10, type=float)
+        parser.add_argument(
+            "--report",
+            metavar="FILE",
+            help="Write the results as JSON file.",
+            default=None,
+            type=str,
+        )
+        parser.set_defaults(deprecated=None)
+        parser.add_argument("--version", action="version",
+                            version=f"{__version__}")
+        args = parser.parse_args()
+
+    except Exception as e:
+        print(f"Error initializing argument parser: {e}")
+        return None
+
+    return args
+
+
+def free_port():
+    """Return a free TCP port on localhost."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=30):
+    """Wait until the viewer answers, returns the list of databases."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/api/v1/databases")
+            return json.loads(connection.getresponse().read())
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("Viewer did not start.")
+
+
+def load(port, path, clients, duration):
+    """Request path with concurrent keep-alive clients, returns requests/s and latency percentiles."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        own = []
+        failed = 0
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except OSError:
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else None,
+    }
+
+
+def main():
+    """Main program function"""
+    parser = argparse.ArgumentParser(
+        prog="viewer_load_test",
+        description="Measure requests/s of the GILDA viewer under gunicorn with different worker counts.",
+        epilog="License GPL-3+ (C) 2025 Michael Wolf, www.mictronics.de",
+    )
+    args = initArgParser(parser)
+    if args is None or args.input is None:
+        print("Input path with database location must be specified.")
+        parser.print_help()
+        sys.exit(1)
+
+    results = []
+    for workers in args.workers:
+        port = free_port()
+        env = dict(os.environ, GILDA_VIEWER_INPUT=str(Path(args.input).resolve()))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "--chdir", str(BACKEND), "--workers", str(workers),
+             "--threads", str(args.threads), "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "wsgi:app"],
+            env=env,
+        )
+        try:
+            databases = wait_ready(port)
+            if len(databases) == 0:
+                print("No database found in input path.")
+                sys.exit(1)
+            path = "/api/v1/structures?" + urlencode({"database": databases[0]["path"], "size": 50})
+            result = load(port, path, args.clients, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        result["workers"] = workers
+        result["threads"] = args.threads
+        results.append(result)
+        print(
+            f"{workers} workers: {result['requests_per_second']:.0f} requests/s, "
+            f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, {result['errors']} errors"
+        )
+
+    if args.report is not None:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"clients": args.clients, "duration": args.duration, "results": results}, f, indent=2)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
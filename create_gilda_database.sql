@@ -5,8 +5,10 @@ CREATE TABLE "DataStructures" (
 	"EngName"	TEXT NOT NULL UNIQUE,
 	"SourcePartition"	INTEGER,
 	"Channel"	INTEGER,
+	"SourceFile"	INTEGER,
 	PRIMARY KEY("Id"),
-	FOREIGN KEY("SourcePartition") REFERENCES "PartitionList"("Id")
+	FOREIGN KEY("SourcePartition") REFERENCES "PartitionList"("Id"),
+	FOREIGN KEY("SourceFile") REFERENCES "ImportManifest"("Id")
 );
 DROP TABLE IF EXISTS "EthernetDefinitionList";
 CREATE TABLE "EthernetDefinitionList" (
@@ -134,6 +136,23 @@ CREATE TABLE "ArincDiscretes" (
 	PRIMARY KEY("Value","Name","Label","Offset","ParameterFieldsId"),
 	FOREIGN KEY("ParameterFieldsId") REFERENCES "ParameterFields"("Id")
 );
+DROP TABLE IF EXISTS "ImportManifest";
+CREATE TABLE "ImportManifest" (
+	"Id"	INTEGER NOT NULL,
+	"Path"	TEXT NOT NULL UNIQUE,
+	"Size"	INTEGER NOT NULL,
+	"MTime"	INTEGER NOT NULL,
+	"Hash"	TEXT NOT NULL,
+	"Root"	TEXT NOT NULL DEFAULT '',
+	PRIMARY KEY("Id")
+);
+CREATE INDEX IF NOT EXISTS "IdxChannelsDescription" ON "Channels" ("Description");
+CREATE INDEX IF NOT EXISTS "IdxDataStructuresChannel" ON "DataStructures" ("Channel");
+CREATE INDEX IF NOT EXISTS "IdxDataStructuresSourceFile" ON "DataStructures" ("SourceFile");
+CREATE INDEX IF NOT EXISTS "IdxParameterFieldsDataStructure" ON "ParameterFields" ("DataStructure");
+CREATE INDEX IF NOT EXISTS "IdxParameterArincParameterFieldsId" ON "ParameterArinc" ("ParameterFieldsId");
+CREATE INDEX IF NOT EXISTS "IdxArincDiscretesParameterFieldsId" ON "ArincDiscretes" ("ParameterFieldsId");
+CREATE INDEX IF NOT EXISTS "IdxDataStructuresEngNameNocase" ON "DataStructures" ("EngName" COLLATE NOCASE);
 INSERT INTO "Equipments" VALUES (1,'AMC');
 INSERT INTO "Equipments" VALUES (2,'MFD');
 INSERT INTO "Equipments" VALUES (3,'DTD');
@@ -15,19 +15,178 @@
 # You should have received a copy of the GNU General Public License
 # along with GILDA parser. If not, see http://www.gnu.org/licenses/.
 #
+import os
 import sqlite3
+from contextlib import closing
+from pathlib import Path
+from gilda_memory import row_size
+
+# PRAGMA settings of the connection profiles
+PROFILES = {
+    # Durable writes, every commit is synced to disk
+    "safe": {
+        "journal_mode": "TRUNCATE",
+    },
+    # Build-once database, a crash during import leaves a corrupt file.
+    # The rollback journal is kept in memory, so rolling back a failed file still works.
+    "bulk-build": {
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,
+    },
+}
+
+# Shared by single row and batched writers
+FIELD_UPSERT = """INSERT INTO ParameterFields
+     (Name, RefEngName, Size, Offset, Type, SourcePartition, DataStructure, Unit, Description, Min, Max, LowBit, HighBit)
+     VALUES
+     (:name, :eng_name, :size, :offset, :type, :src_partition, :structure_id, :unit, :description, :min, :max, :low_bit, :high_bit)
+     ON CONFLICT(Name)
+     DO UPDATE SET
+     RefEngName = :eng_name,
+     Size = :size,
+     Offset = :offset,
+     Type = :type,
+     SourcePartition = :src_partition,
+     DataStructure = :structure_id,
+     Unit = :unit,
+     Description = :description,
+     Min = :min,
+     Max = :max,
+     LowBit = :low_bit,
+     HighBit = :high_bit
+     WHERE Name = :name;"""
+
+ENUM_VALUE_INSERT = """INSERT OR REPLACE INTO ParameterEnumValues (ParameterField, Value, Definition)
+     VALUES (:field_id, :value, :definition_id);"""
+
+ARINC_PARAMETER_UPSERT = """INSERT INTO ParameterArinc
+     (ParameterFieldsId, Label, Name, Description, Type, Offset, Length, Unit, Min, Max, ScaleFactor)
+     VALUES
+     (:parameter_field_id, :label, :name, :desc, :type, :offset, :length, :unit, :min, :max, :scale)
+     ON CONFLICT(Label, Name, ParameterFieldsId)
+     DO UPDATE SET
+     Description = :desc,
+     Type = :type,
+     Offset = :offset,
+     Length = :length,
+     Unit = :unit,
+     Min = :min,
+     Max = :max,
+     ScaleFactor = :scale
+     WHERE Label = :label AND Name = :name AND ParameterFieldsId = :parameter_field_id;"""
+
+ARINC_DISCRETE_INSERT = """INSERT OR IGNORE INTO ArincDiscretes
+     (Value, Name, Label, Offset, ParameterFieldsId)
+     VALUES
+     (:value, :name, :label, :offset, :parameter_field_id);"""
+
+# Full-text search tables, rebuilt from their source tables by build_search_index().
+# Fields and enum definitions are contentless and keyed by their Id as rowid,
+# ARINC parameters have no stable rowid and keep their own copy.
+SEARCH_TABLES = {
+    "SearchParameterFields": (
+        """CREATE VIRTUAL TABLE "SearchParameterFields"
+         USING fts5(Name, RefEngName, Description, Comment, content='');""",
+        """INSERT INTO SearchParameterFields (rowid, Name, RefEngName, Description, Comment)
+         SELECT Id, Name, RefEngName, Description, Comment FROM ParameterFields;""",
+    ),
+    "SearchEnumDefinitions": (
+        """CREATE VIRTUAL TABLE "SearchEnumDefinitions"
+         USING fts5(Definition, Comment, content='');""",
+        """INSERT INTO SearchEnumDefinitions (rowid, Definition, Comment)
+         SELECT Id, Definition, Comment FROM ParameterEnumDefinitions;""",
+    ),
+    "SearchParameterArinc": (
+        """CREATE VIRTUAL TABLE "SearchParameterArinc"
+         USING fts5(Name, Description, Label UNINDEXED, ParameterFieldsId UNINDEXED);""",
+        """INSERT INTO SearchParameterArinc (Name, Description, Label, ParameterFieldsId)
+         SELECT Name, Description, Label, ParameterFieldsId FROM ParameterArinc;""",
+    ),
+}
+
+# Element name and source file of rows reported by foreign_key_check()
+FK_CONTEXT = {
+    "DataStructures": """SELECT t.EngName, m.Path FROM DataStructures t
+     LEFT JOIN ImportManifest m ON t.SourceFile = m.Id WHERE t.rowid = ?;""",
+    "ParameterFields": """SELECT t.Name, m.Path FROM ParameterFields t
+     LEFT JOIN DataStructures ds ON t.DataStructure = ds.Id
+     LEFT JOIN ImportManifest m ON ds.SourceFile = m.Id WHERE t.rowid = ?;""",
+    "ParameterEnumValues": """SELECT pf.Name || ' = ' || t.Value, m.Path FROM ParameterEnumValues t
+     LEFT JOIN ParameterFields pf ON t.ParameterField = pf.Id
+     LEFT JOIN DataStructures ds ON pf.DataStructure = ds.Id
+     LEFT JOIN ImportManifest m ON ds.SourceFile = m.Id WHERE t.rowid = ?;""",
+    "ParameterArinc": """SELECT t.Name, m.Path FROM ParameterArinc t
+     LEFT JOIN ParameterFields pf ON t.ParameterFieldsId = pf.Id
+     LEFT JOIN DataStructures ds ON pf.DataStructure = ds.Id
+     LEFT JOIN ImportManifest m ON ds.SourceFile = m.Id WHERE t.rowid = ?;""",
+    "ArincDiscretes": """SELECT t.Name, m.Path FROM ArincDiscretes t
+     LEFT JOIN ParameterFields pf ON t.ParameterFieldsId = pf.Id
+     LEFT JOIN DataStructures ds ON pf.DataStructure = ds.Id
+     LEFT JOIN ImportManifest m ON ds.SourceFile = m.Id WHERE t.rowid = ?;""",
+    "Channels": "SELECT t.Description, NULL FROM Channels t WHERE t.rowid = ?;",
+}
+
+
+def describe_violation(violation) -> str:
+    """Format a foreign key violation from Database.foreign_key_check() for output."""
+    text = f"{violation['table']} row {violation['rowid']}"
+    if violation["element"] is not None:
+        text += f" '{violation['element']}'"
+    text += f": {violation['column']} references missing {violation['parent']}"
+    if violation["file"] is not None:
+        text += f" (in '{violation['file']}')"
+    return text
+
+
+def has_gilda_schema(database_path) -> bool:
+    """Check if a database file exists and holds the GILDA schema, without creating or changing it."""
+    if not os.path.isfile(database_path):
+        return False
+    try:
+        uri = f"{Path(database_path).resolve().as_uri()}?mode=ro"
+        with closing(sqlite3.connect(uri, uri=True)) as connection:
+            row = connection.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'DataStructures';"
+            ).fetchone()
+    except sqlite3.DatabaseError:
+        return False
+    return row[0] == 1
 
 
 class Database:
     """Database connection and operations for GILDA parser."""
 
-    def __init__(self, database_path):
+    def __init__(self, database_path, bulk: bool = False, checkpoint: int = 0, optimize_on_close: bool = True,
+                 batch_size: int = 1000, profile: str = "safe", memory: bool = False):
+        self.optimize_on_close = optimize_on_close
+        # In memory mode the database file is only read on open and written on close
+        self.database_path = database_path
+        self.memory = memory
+        # Row buffers of the batched writers
+        self.batch_size = batch_size
+        self.field_rows = []
+        self.enum_rows = []
+        # Optional MemoryBudget bounding the size of queued rows
+        self.memory_budget = None
+        self.queued_bytes = 0
+        # In bulk mode commits are deferred until the caller ends the
+        # transaction, or until checkpoint rows are pending when > 0.
+        self.bulk = bulk
+        self.checkpoint = checkpoint
+        self.pending = 0
         # Connect to database
         try:
             self.database = sqlite3.connect(
-                database_path, isolation_level="DEFERRED")
+                ":memory:" if memory else database_path, isolation_level="DEFERRED")
+            if memory and os.path.isfile(database_path):
+                with closing(sqlite3.connect(database_path)) as source:
+                    source.backup(self.database)
             self.cursor = self.database.cursor()
-            self.database.execute("PRAGMA journal_mode = TRUNCATE;")
+            for pragma, value in PROFILES[profile].items():
+                self.database.execute(f"PRAGMA {pragma} = {value};")
             self.database.execute("PRAGMA foreign_keys = ON;")
             self.database.commit()
         except Exception as e:
@@ -38,7 +197,18 @@ class Database:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.optimize()
+        if exc_type is not None:
+            self.rollback()
+        else:
+            self.flush()
+        if self.optimize_on_close:
+            self.optimize()
+        else:
+            self.commit(force=True)
+        # Persist an in-memory database in one step, unless it failed
+        if self.memory and exc_type is None:
+            with closing(sqlite3.connect(self.database_path)) as target:
+                self.database.backup(target)
         self.cursor.close()
         self.database.close()
 
@@ -46,11 +216,29 @@ class Database:
         """Close the database connection."""
         self.__exit__(None, None, None)
 
+    def commit(self, force: bool = False, rows: int = 1):
+        """Commit pending changes, deferred in bulk mode unless forced or at checkpoint."""
+        if self.bulk and not force:
+            self.pending += rows
+            if self.checkpoint <= 0 or self.pending < self.checkpoint:
+                return
+        self.database.commit()
+        self.pending = 0
+
+    def rollback(self):
+        """Discard all changes since the last commit, including queued rows."""
+        self.field_rows = []
+        self.enum_rows = []
+        self.queued_bytes = 0
+        self.database.rollback()
+        self.pending = 0
+
     def create(self, sql):
         """Create database schema."""
         self.database.execute("PRAGMA foreign_keys = OFF;")
         self.cursor.executescript(sql)
         self.database.commit()
+        self.database.execute("PRAGMA foreign_keys = ON;")
 
     def get_partitions(self):
         """Retrieve static partition list from the database."""
@@ -72,13 +260,13 @@ class Database:
     def insert_structure(self, data):
         """Insert a data structure into the database."""
         self.cursor.execute(
-            """INSERT INTO DataStructures (EngName, SourcePartition, Channel)
-             VALUES (:name, :src_partition, :channel_id)
+            """INSERT INTO DataStructures (EngName, SourcePartition, Channel, SourceFile)
+             VALUES (:name, :src_partition, :channel_id, :source_file)
              ON CONFLICT(EngName)
-             DO UPDATE SET SourcePartition = :src_partition WHERE EngName = :name;""",
+             DO UPDATE SET SourcePartition = :src_partition, SourceFile = :source_file WHERE EngName = :name;""",
             data,
         )
-        self.database.commit()
+        self.commit()
         # Retrieve the ID of the inserted structure
         row = self.cursor.execute(
             "SELECT Id FROM DataStructures WHERE EngName = ?;", [data["name"]]
@@ -91,7 +279,7 @@ class Database:
             "INSERT OR IGNORE INTO ParameterTypes (Type) VALUES (:type);", [
                 type]
         )
-        self.database.commit()
+        self.commit()
         # Retrieve the ID of the inserted type
         row = self.cursor.execute(
             "SELECT Id FROM ParameterTypes WHERE Type = ?;", [type]
@@ -109,7 +297,7 @@ class Database:
             "INSERT OR IGNORE INTO ParameterUnits (Unit) VALUES (:unit);", [
                 unit]
         )
-        self.database.commit()
+        self.commit()
         # Retrieve the ID of the inserted unit
         row = self.cursor.execute(
             "SELECT Id FROM ParameterUnits WHERE Unit = ?;", [unit]
@@ -130,7 +318,7 @@ class Database:
              DO UPDATE SET Comment = :comment WHERE Definition = :definition;""",
             data,
         )
-        self.database.commit()
+        self.commit()
         # Retrieve the ID of the inserted definition
         row = self.cursor.execute(
             "SELECT Id FROM ParameterEnumDefinitions WHERE Definition = ?;",
@@ -146,44 +334,74 @@ class Database:
     def insert_enum_value(self, data):
         """Insert parameter enum value into the database."""
         # First try to insert or update to ensure all values are set
-        self.cursor.execute(
-            """INSERT OR REPLACE INTO ParameterEnumValues (ParameterField, Value, Definition) VALUES (:field_id, :value, :definition_id);""",
-            data,
-        )
-        self.database.commit()
+        self.cursor.execute(ENUM_VALUE_INSERT, data)
+        self.commit()
 
     def insert_field(self, data):
         """Insert parameter fields into the database."""
         # First try to insert or update to ensure all fields are set
-        self.cursor.executemany(
-            """INSERT INTO ParameterFields
-             (Name, RefEngName, Size, Offset, Type, SourcePartition, DataStructure, Unit, Description, Min, Max, LowBit, HighBit)
-             VALUES
-             (:name, :eng_name, :size, :offset, :type, :src_partition, :structure_id, :unit, :description, :min, :max, :low_bit, :high_bit)
-             ON CONFLICT(Name)
-             DO UPDATE SET
-             RefEngName = :eng_name,
-             Size = :size,
-             Offset = :offset,
-             Type = :type,
-             SourcePartition = :src_partition,
-             DataStructure = :structure_id,
-             Unit = :unit,
-             Description = :description,
-             Min = :min,
-             Max = :max,
-             LowBit = :low_bit,
-             HighBit = :high_bit
-             WHERE Name = :name;""",
-            [data],
-        )
-        self.database.commit()
+        self.cursor.execute(FIELD_UPSERT, data)
+        self.commit()
         # Retrieve the ID of the inserted field
         row = self.cursor.execute(
             "SELECT Id FROM ParameterFields WHERE Name = ?;", [data["name"]]
         )
         return row.fetchone()[0]
 
+    def add_field(self, data):
+        """Queue a parameter field for a batched insert, see flush()."""
+        self.field_rows.append(data)
+        if len(self.field_rows) >= self.batch_size or self.over_budget(data):
+            self.flush()
+
+    def add_enum_value(self, data):
+        """
+        Queue a parameter enum value for a batched insert, see flush().
+        The value references its parameter field by "field_name", the ID is resolved when flushed.
+        """
+        self.enum_rows.append(data)
+        if len(self.enum_rows) >= self.batch_size or self.over_budget(data):
+            self.flush()
+
+    def over_budget(self, data) -> bool:
+        """Account a queued row against the memory budget, True when the queued rows reach it."""
+        if self.memory_budget is None:
+            return False
+        self.queued_bytes += row_size(data)
+        return self.memory_budget.exceeded(self.queued_bytes)
+
+    def flush(self):
+        """Write queued parameter fields and enum values with one executemany per table."""
+        rows = len(self.field_rows) + len(self.enum_rows)
+        if rows == 0:
+            return
+        self.queued_bytes = 0
+        if len(self.field_rows) > 0:
+            self.cursor.executemany(FIELD_UPSERT, self.field_rows)
+            self.field_rows = []
+        if len(self.enum_rows) > 0:
+            # Resolve field IDs of all queued values with a single lookup
+            field_ids = self.get_field_ids({r["field_name"] for r in self.enum_rows})
+            for r in self.enum_rows:
+                r["field_id"] = field_ids[r["field_name"]]
+            self.cursor.executemany(ENUM_VALUE_INSERT, self.enum_rows)
+            self.enum_rows = []
+        self.commit(rows=rows)
+
+    def get_field_ids(self, names):
+        """Retrieve a mapping of parameter field names to their IDs."""
+        names = list(names)
+        ids = {}
+        # Stay below the SQLite host parameter limit
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            row = self.cursor.execute(
+                f"SELECT Name, Id FROM ParameterFields WHERE Name IN ({','.join('?' * len(chunk))});",
+                chunk,
+            )
+            ids.update(row.fetchall())
+        return ids
+
     def get_channel_source(self, equipment: str, module: str):
         """Retrieve channel source mapping from the database."""
         eq_row = self.cursor.execute(
@@ -219,17 +437,16 @@ class Database:
              WHERE Id = :id;""",
             data,
         )
-        self.database.commit()
+        self.commit()
 
-    def get_channel_id(self, desc):
-        """Retrieve channel ID by name."""
-        row = self.cursor.execute(
-            "SELECT Id FROM Channels WHERE Description = ?;", [desc]
-        )
-        result = row.fetchone()
-        if result is not None:
-            return result[0]
-        return None
+    def get_channels(self):
+        """Retrieve channel IDs from the database, mapped by their description."""
+        row = self.cursor.execute("SELECT Id, Description FROM Channels ORDER BY rowid;")
+        channels = {}
+        # Keep the first channel of a description
+        for r in row.fetchall():
+            channels.setdefault(r[1], r[0])
+        return channels
 
     def get_fifo_parameter_fields(self):
         """Retrieve ARINC related parameter fields from the database."""
@@ -238,49 +455,150 @@ class Database:
             r[1]: {"parameter_field_id": r[0], "fido_file": ""} for r in row.fetchall()
         }
 
-    def insert_arinc_parameter(self, data):
-        """Insert ARINC parameter into the database."""
+    def insert_arinc_parameters(self, rows):
+        """Insert ARINC parameters into the database with a single executemany."""
+        if len(rows) == 0:
+            return
+        self.cursor.executemany(ARINC_PARAMETER_UPSERT, rows)
+        self.commit(rows=len(rows))
+
+    def insert_arinc_discretes(self, rows):
+        """Insert ARINC discretes into the database with a single executemany."""
+        if len(rows) == 0:
+            return
+        self.cursor.executemany(ARINC_DISCRETE_INSERT, rows)
+        self.commit(rows=len(rows))
+
+    def build_search_index(self):
+        """Rebuild the full-text search tables of parameter fields, enum definitions and ARINC parameters."""
+        for table, (create, fill) in SEARCH_TABLES.items():
+            # Contentless tables can not be cleared, they are created again
+            self.cursor.execute(f"DROP TABLE IF EXISTS {table};")
+            self.cursor.execute(create)
+            self.cursor.execute(fill)
+        self.commit(force=True)
+
+    def upgrade_schema(self):
+        """Add the import manifest, its input root and indexes to databases created before they were part of the schema."""
         self.cursor.execute(
-            """INSERT INTO ParameterArinc
-             (ParameterFieldsId, Label, Name, Description, Type, Offset, Length, Unit, Min, Max, ScaleFactor)
-             VALUES
-             (:parameter_field_id, :label, :name, :desc, :type, :offset, :length, :unit, :min, :max, :scale)
-             ON CONFLICT(Label, Name, ParameterFieldsId)
-             DO UPDATE SET
-             Description = :desc,
-             Type = :type,
-             Offset = :offset,
-             Length = :length,
-             Unit = :unit,
-             Min = :min,
-             Max = :max,
-             ScaleFactor = :scale
-             WHERE Label = :label AND Name = :name AND ParameterFieldsId = :parameter_field_id;""",
-            data,
+            """CREATE TABLE IF NOT EXISTS "ImportManifest" (
+             "Id" INTEGER NOT NULL,
+             "Path" TEXT NOT NULL UNIQUE,
+             "Size" INTEGER NOT NULL,
+             "MTime" INTEGER NOT NULL,
+             "Hash" TEXT NOT NULL,
+             "Root" TEXT NOT NULL DEFAULT '',
+             PRIMARY KEY("Id"));"""
         )
-        self.database.commit()
+        columns = [r[1] for r in self.cursor.execute("PRAGMA table_info(ImportManifest);")]
+        if "Root" not in columns:
+            self.cursor.execute("""ALTER TABLE ImportManifest ADD COLUMN "Root" TEXT NOT NULL DEFAULT '';""")
+        columns = [r[1] for r in self.cursor.execute("PRAGMA table_info(DataStructures);")]
+        if "SourceFile" not in columns:
+            self.cursor.execute(
+                """ALTER TABLE DataStructures ADD COLUMN "SourceFile" INTEGER REFERENCES "ImportManifest"("Id");"""
+            )
+        self.cursor.executescript(
+            """CREATE INDEX IF NOT EXISTS "IdxChannelsDescription" ON "Channels" ("Description");
+             CREATE INDEX IF NOT EXISTS "IdxDataStructuresChannel" ON "DataStructures" ("Channel");
+             CREATE INDEX IF NOT EXISTS "IdxDataStructuresSourceFile" ON "DataStructures" ("SourceFile");
+             CREATE INDEX IF NOT EXISTS "IdxParameterFieldsDataStructure" ON "ParameterFields" ("DataStructure");
+             CREATE INDEX IF NOT EXISTS "IdxParameterArincParameterFieldsId" ON "ParameterArinc" ("ParameterFieldsId");
+             CREATE INDEX IF NOT EXISTS "IdxArincDiscretesParameterFieldsId" ON "ArincDiscretes" ("ParameterFieldsId");
+             CREATE INDEX IF NOT EXISTS "IdxDataStructuresEngNameNocase" ON "DataStructures" ("EngName" COLLATE NOCASE);"""
+        )
+        self.commit(force=True)
 
-    def insert_arinc_discretes(self, data):
-        """Insert ARINC discretes into the database."""
+    def get_manifest(self):
+        """Retrieve the import manifest, mapping file paths to their recorded state."""
+        row = self.cursor.execute("SELECT Id, Path, Size, MTime, Hash, Root FROM ImportManifest;")
+        return {
+            r[1]: {"id": r[0], "size": r[2], "mtime": r[3], "hash": r[4], "root": r[5]} for r in row.fetchall()
+        }
+
+    def insert_manifest(self, data):
+        """Insert or update an import manifest entry."""
         self.cursor.execute(
-            """INSERT OR IGNORE INTO ArincDiscretes
-             (Value, Name, Label, Offset, ParameterFieldsId)
-             VALUES
-             (:value, :name, :label, :offset, :parameter_field_id);""",
+            """INSERT INTO ImportManifest (Path, Size, MTime, Hash, Root)
+             VALUES (:path, :size, :mtime, :hash, :root)
+             ON CONFLICT(Path)
+             DO UPDATE SET Size = :size, MTime = :mtime, Hash = :hash, Root = :root WHERE Path = :path;""",
             data,
         )
-        self.database.commit()
+        self.commit()
+        # Retrieve the ID of the inserted entry
+        row = self.cursor.execute(
+            "SELECT Id FROM ImportManifest WHERE Path = ?;", [data["path"]]
+        )
+        return row.fetchone()[0]
+
+    def delete_manifest(self, manifest_id):
+        """Delete an import manifest entry together with all data imported from its file."""
+        self.delete_file_structures(manifest_id)
+        self.cursor.execute("DELETE FROM ImportManifest WHERE Id = ?;", [manifest_id])
+        self.commit()
+
+    def delete_file_structures(self, manifest_id):
+        """Delete data structures imported from a file, including their fields and dependent rows."""
+        fields = """SELECT pf.Id FROM ParameterFields pf
+             JOIN DataStructures ds ON pf.DataStructure = ds.Id WHERE ds.SourceFile = ?"""
+        self.cursor.execute(
+            f"DELETE FROM ArincDiscretes WHERE ParameterFieldsId IN ({fields});", [manifest_id]
+        )
+        self.cursor.execute(
+            f"DELETE FROM ParameterArinc WHERE ParameterFieldsId IN ({fields});", [manifest_id]
+        )
+        self.cursor.execute(
+            f"DELETE FROM ParameterEnumValues WHERE ParameterField IN ({fields});", [manifest_id]
+        )
+        self.cursor.execute(
+            """DELETE FROM ParameterFields WHERE DataStructure IN
+             (SELECT Id FROM DataStructures WHERE SourceFile = ?);""",
+            [manifest_id],
+        )
+        self.cursor.execute("DELETE FROM DataStructures WHERE SourceFile = ?;", [manifest_id])
+        self.commit()
 
-    def foreign_key_check(self) -> int:
+    def foreign_key_check(self, tables=None):
         """
-        Perform foreign key check.
+        Perform foreign key check, limited to the given tables or across the whole database.
         If the check fails a foreign key violation exists in the Gilda imported data.
+        Returns a list of violations with table, row, column, parent table, element name and source file.
         """
-        rows = self.cursor.execute("PRAGMA foreign_key_check;")
-        return len(rows.fetchall())
+        if tables is None:
+            rows = self.cursor.execute("PRAGMA foreign_key_check;").fetchall()
+        else:
+            rows = []
+            for table in tables:
+                rows += self.cursor.execute(f'PRAGMA foreign_key_check("{table}");').fetchall()
+        violations = []
+        columns = {}
+        for table, rowid, parent, fkid in rows:
+            # Map foreign key IDs of the table to their column names
+            if table not in columns:
+                fk_list = self.cursor.execute(f'PRAGMA foreign_key_list("{table}");').fetchall()
+                columns[table] = {r[0]: r[3] for r in fk_list}
+            element, file = None, None
+            if table in FK_CONTEXT:
+                context = self.cursor.execute(FK_CONTEXT[table], [rowid]).fetchone()
+                if context is not None:
+                    element, file = context
+            violations.append({
+                "table": table,
+                "rowid": rowid,
+                "column": columns[table].get(fkid),
+                "parent": parent,
+                "element": element,
+                "file": file,
+            })
+        return violations
+
+    def set_cache_size(self, kib: int):
+        """Limit the SQLite page cache of the connection to kib kilobytes."""
+        self.database.execute(f"PRAGMA cache_size = -{int(kib)};")
 
     def optimize(self):
         """Optimize the database."""
         self.cursor.execute("PRAGMA optimize;")
-        self.database.commit()
+        self.commit(force=True)
         self.cursor.execute("VACUUM;")
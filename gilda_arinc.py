@@ -14,26 +14,163 @@
 #
 import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from database import Database
 
+# Fido column of an ARINC type mapped to the database type
+ARINC_TYPES = {
+    "DIS": "discrete",
+    "BIN": "binary",
+    "BCD": "bcd",
+    "TOR": "bool",
+    "BNR": "binary",
+}
+
+# Separates the value in binary representation from the name of a discrete
+DISCRETE_PATTERN = re.compile(r"(?P<value>[01]+) (?P<name>.*)")
+
+
+def read_fido(fido_path: str, parameter_field_id: int):
+    """
+    Read a fido file and return its ARINC parameter and discrete rows.
+    Parameter rows hold type and unit names, they are resolved to IDs when stored.
+    """
+    with open(fido_path, "r", encoding="utf-8", errors="replace") as fido:
+        lines = fido.read().splitlines()
+
+    parameters = []
+    discretes = []
+    # Label and offset are needed for linking ARINC discrete values to parameter
+    label = None
+    offset = None
+    type = None
+    unit = None
+    for line in lines:
+        parts = line.split("!")
+        if len(parts) < 18:
+            continue
+        # Only strip the columns in use
+        first, label_column, name, desc = parts[0].strip(), parts[3].strip(), parts[9].strip(), parts[10].strip()
+        if first == "#":
+            continue
+
+        if name != "":
+            # Check for begin of ARINC parameter definition
+            if line.startswith("*"):
+                # Store ARINC label if we got a new definition
+                label = int(label_column)
+
+            # Parameters should always have a type, except it's a discrete definition
+            arinc_type = parts[11].strip()
+            if arinc_type != "":
+                type = ARINC_TYPES.get(arinc_type)
+                if type is None:
+                    raise ValueError(f"Parameter type not found: {arinc_type}")
+            # We may also have a parameter unit
+            arinc_unit = parts[14].strip()
+            if arinc_unit != "":
+                unit = "unitless" if arinc_unit == "S.U." else arinc_unit
+            if type is None or unit is None:
+                raise ValueError(f"Parameter type or unit missing: {desc}")
+            if label is None:
+                raise ValueError(f"Parameter name or label missing: {desc}")
+
+            min_max = parts[15].split()
+            # Remember the offset for linking discrete definitions to a parameter
+            offset = int(parts[13])
+            parameters.append({
+                "parameter_field_id": parameter_field_id,
+                "name": name,
+                "label": label,
+                "type": type,
+                "unit": unit,
+                "desc": desc,
+                "length": int(parts[12]),
+                "offset": offset,
+                "min": float(min_max[0]),
+                "max": float(min_max[1]),
+                "scale": float(parts[16]),
+            })
+        # Handle ARINC discrete definition
+        # Fido field 10 is the only non-empty field.
+        elif label_column == "" and desc != "":
+            match = DISCRETE_PATTERN.search(desc)
+            if match is None:
+                raise ValueError(f"Discrete value missing: {desc}")
+            discretes.append({
+                "value": int(match["value"], base=2),
+                "name": match["name"],
+                "label": label,
+                "offset": offset,
+                "parameter_field_id": parameter_field_id,
+            })
+    return parameters, discretes
+
+
+def read_fidos(fidos, jobs: int = 1):
+    """
+    Read fido files given as (fido_file, path, parameter_field_id), in worker processes when jobs > 1.
+    Yields (fido_file, result) in input order, calling result() returns the rows of read_fido().
+    Errors of a worker are raised when its result is requested.
+    """
+    if jobs <= 1:
+        for fido_file, fido_path, parameter_field_id in fidos:
+            yield fido_file, partial(read_fido, fido_path, parameter_field_id)
+        return
+
+    fidos = iter(fidos)
+    with ProcessPoolExecutor(jobs) as pool:
+        # Limit the number of files read ahead of the writer
+        pending = deque()
+        for fido_file, fido_path, parameter_field_id in fidos:
+            pending.append((fido_file, pool.submit(read_fido, fido_path, parameter_field_id)))
+            if len(pending) >= 2 * jobs:
+                break
+        while len(pending) > 0:
+            fido_file, future = pending.popleft()
+            yield fido_file, future.result
+            next_fido = next(fidos, None)
+            if next_fido is not None:
+                fido_file, fido_path, parameter_field_id = next_fido
+                pending.append((fido_file, pool.submit(read_fido, fido_path, parameter_field_id)))
+
 
 class GildaArinc:
     """GILDA ARINC parser class."""
 
-    def __init__(self, database_path: str):
-        # Initialize database connection
-        self.database = Database(database_path)
+    def __init__(self, database: str | Database, bulk: bool = False, checkpoint: int = 0, jobs: int = 1):
+        # Number of worker processes reading fido files
+        self.jobs = jobs
+        # Use a shared database session or open a private connection
+        self.shared = isinstance(database, Database)
+        if self.shared:
+            self.database = database
+        else:
+            self.database = Database(database, bulk, checkpoint)
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        # Close database connection
-        self.database.close()
-
-    def is_binary_string(self, s):
-        """Check if a string is a binary representation (only '0' and '1')."""
-        return set(s).issubset({"0", "1"})
+        # Close database connection, a shared session is closed by its owner
+        if not self.shared:
+            self.database.close()
+
+    def store_fido(self, parameters, discretes):
+        """Resolve type and unit IDs of fido rows and insert them with one statement per table."""
+        for row in parameters:
+            if row["type"] not in self.types:
+                # Insert new type into the database
+                self.types[row["type"]] = self.database.insert_type(row["type"])
+            if row["unit"] not in self.units:
+                # Insert new unit into the database
+                self.units[row["unit"]] = self.database.insert_unit(row["unit"])
+            row["type"] = self.types[row["type"]]
+            row["unit"] = self.units[row["unit"]]
+        self.database.insert_arinc_parameters(parameters)
+        self.database.insert_arinc_discretes(discretes)
 
     def parse(self, arinc_conf: str):
         """Parse a GILDA ARINC Fido configuration and insert data into the database."""
@@ -43,15 +180,8 @@ class GildaArinc:
             return
 
         path = os.path.dirname(arinc_conf)
-        types = self.database.get_types()
-        units = self.database.get_units()
-        arinc_type_to_db_type = {
-            "DIS": "discrete",
-            "BIN": "binary",
-            "BCD": "bcd",
-            "TOR": "bool",
-            "BNR": "binary",
-        }
+        self.types = self.database.get_types()
+        self.units = self.database.get_units()
 
         try:
             # Read ARINC configuration file
@@ -66,96 +196,22 @@ class GildaArinc:
                     if bus in fifo_to_file:
                         fifo_to_file[bus]["fido_file"] = fido_file
 
-            # Parse fido file for each FIFO parameter field
-            for _fifo, file in fifo_to_file.items():
-                if file["fido_file"] == "":
-                    continue
+            # Fido files are read by workers, this process resolves IDs and writes
+            fidos = [
+                (file["fido_file"], os.path.join(path, file["fido_file"]), file["parameter_field_id"])
+                for file in fifo_to_file.values()
+                if file["fido_file"] != ""
+            ]
+            for fido_file, result in read_fidos(fidos, self.jobs):
                 try:
-                    with open(os.path.join(path, file["fido_file"]), "r", encoding="utf-8", errors="replace") as fido:
-                        # Label and offset are needed for linking ARINC discrete values to parameter
-                        label = None
-                        offset = None
-                        for line in fido:
-                            # Check for begin of ARINC parameter definition
-                            parts = line.strip().split("!")
-                            parts = [p.strip() for p in parts]
-                            if len(parts) < 18 or parts[0] == "#":
-                                continue
-
-                            if line.startswith("*") and parts[9] != "":
-                                # Store ARINC label if we got a new definition
-                                label = int(parts[3])
-
-                            if parts[9] != "":
-                                # Handle parameter definitions within a label
-                                if parts[11] != "":
-                                    # Parameters should always have a type, except it's a discrete definition
-                                    type = arinc_type_to_db_type.get(
-                                        parts[11])
-                                    if type is None:
-                                        raise ValueError(
-                                            f"Parameter type not found: {parts[11]}")
-
-                                    if type not in types:
-                                        # Insert new type into the database
-                                        id = self.database.insert_type(
-                                            type)
-                                        types[type] = id
-
-                                if parts[14] != "":
-                                    # We may also have a parameter unit
-                                    unit = parts[14]
-                                    if unit == "S.U.":
-                                        unit = "unitless"
-                                    if unit not in units:
-                                        # Insert new unit into the database
-                                        id = self.database.insert_unit(
-                                            unit)
-                                        units[unit] = id
-
-                                min_max = parts[15].split(" ")
-                                if label is None:
-                                    raise ValueError(
-                                        f"Parameter name or label missing: {parts[10]}")
-                                # Remember the offset for linking discrete definitions to a parameter
-                                offset = int(parts[13])
-                                arinc_data = {
-                                    "parameter_field_id": file["parameter_field_id"],
-                                    "name": parts[9],
-                                    "label": label,
-                                    "type": types[type],
-                                    "unit": units[unit],
-                                    "desc": parts[10],
-                                    "length": int(parts[12]),
-                                    "offset": offset,
-                                    "min": float(min_max[0]),
-                                    "max": float(min_max[1]),
-                                    "scale": float(parts[16]),
-                                }
-                                # Store new ARINC parameter in database
-                                self.database.insert_arinc_parameter(
-                                    arinc_data)
-                            # Handle ARINC discrete definition
-                            # Fido field 10 is the only non-empty field.
-                            elif parts[3] == "" and parts[10] != "":
-                                # Separate the value in binary representation from its name
-                                rgx = r"(?P<value>[01]+) (?P<name>.*)"
-                                value, name = re.findall(
-                                    rgx, parts[10], re.MULTILINE)[0]
-                                # Ensure the value is in binary representation
-                                if self.is_binary_string(value):
-                                    # Convert to integer and store in database
-                                    value = int(value, base=2)
-                                    self.database.insert_arinc_discretes(
-                                        {"value": value,
-                                         "name": name,
-                                         "label": label,
-                                         "offset": offset,
-                                         "parameter_field_id": file["parameter_field_id"]
-                                         })
+                    parameters, discretes = result()
+                    self.store_fido(parameters, discretes)
+                    # Each fido file is committed at once
+                    self.database.commit(force=True)
 
                 except Exception as e:
-                    print(f"Error parsing FIDO file {file["fido_file"]}: {e}")
+                    print(f"Error parsing FIDO file {fido_file}: {e}")
+                    self.database.rollback()
 
         except Exception as e:
             print(f"Error parsing ARINC file {arinc_conf}: {e}")
@@ -0,0 +1,111 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import hashlib
+import os
+from pathlib import Path
+from database import Database
+
+
+class GildaManifest:
+    """Track imported GILDA XML files by size, modification time and content hash."""
+
+    def __init__(self, database: Database, input_path: str, incremental: bool = False):
+        self.database = database
+        self.input_path = input_path
+        # Input root recorded with every entry, only entries of the same root are pruned
+        self.root = str(Path(input_path).resolve())
+        self.incremental = incremental
+        # Manifest entries of earlier imports, keyed by path relative to the input path
+        self.entries = self.database.get_manifest()
+        self.seen = set()
+        self.state = {}
+
+    def relative_path(self, file):
+        """Return the manifest key of a file."""
+        return Path(file).relative_to(self.input_path).as_posix()
+
+    def changed(self, file) -> bool:
+        """
+        Check if a file needs to be imported.
+        Outside incremental mode every file is imported. Files with unchanged size and modification time are skipped
+        without reading them, otherwise the content hash decides.
+        """
+        path = self.relative_path(file)
+        self.seen.add(path)
+        stat = os.stat(file)
+        state = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": None, "root": self.root}
+        self.state[path] = state
+        entry = self.entries.get(path)
+        if not self.incremental or entry is None or entry["hash"] == "":
+            return True
+        if entry["size"] == state["size"] and entry["mtime"] == state["mtime"]:
+            if entry["root"] != self.root:
+                # Unchanged, but now imported from this root
+                self.database.insert_manifest({**state, "hash": entry["hash"]})
+            return False
+        state["hash"] = file_hash(file)
+        if entry["hash"] == state["hash"]:
+            # Touched but unchanged, only remember the new modification time
+            self.database.insert_manifest(state)
+            return False
+        return True
+
+    def begin(self, file) -> int:
+        """
+        Prepare the import of a changed file and return its manifest ID to link imported structures.
+        Structures imported from an earlier version of the file are deleted in incremental mode.
+        """
+        path = self.relative_path(file)
+        entry = self.entries.get(path)
+        if self.incremental and entry is not None:
+            self.database.delete_file_structures(entry["id"])
+        # The hash is recorded once the import succeeded, a failed file is imported again next time
+        return self.database.insert_manifest({**self.state[path], "hash": ""})
+
+    def complete(self, file):
+        """Record the content hash of a successfully imported file."""
+        state = self.state[self.relative_path(file)]
+        if state["hash"] is None:
+            state["hash"] = file_hash(file)
+        self.database.insert_manifest(state)
+
+    def remove_missing(self):
+        """
+        Delete manifest entries and imported data of files no longer present, incremental mode only.
+        Only entries recorded from the same input root are removed, or recorded before the root was stored.
+        Returns the number of removed files.
+        """
+        if not self.incremental:
+            return 0
+        missing = [
+            entry["id"] for path, entry in self.entries.items()
+            if path not in self.seen and entry["root"] in (self.root, "")
+        ]
+        for manifest_id in missing:
+            self.database.delete_manifest(manifest_id)
+        self.database.commit(force=True)
+        return len(missing)
+
+
+def file_hash(file) -> str:
+    """Return the SHA-256 content hash of a file."""
+    digest = hashlib.sha256()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,60 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import resource
+import sys
+
+# Queued rows may use this fraction of the budget, a quarter is left to the SQLite page cache
+BUFFER_SHARE = 1 / 8
+
+
+def peak_rss() -> int:
+    """Return the peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def row_size(row: dict) -> int:
+    """Estimate the memory of a queued row in bytes, the dictionary and its values."""
+    return sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+
+
+class MemoryBudget:
+    """
+    Memory ceiling of an import. Queued rows are accounted by their size and written once they reach their share
+    of the budget. The resident set size is not used for this, freed memory is rarely returned to the system.
+    """
+
+    def __init__(self, limit_mb: int):
+        self.limit = limit_mb * 1024 * 1024
+        # Bytes of queued rows that trigger a write
+        self.buffer_limit = int(self.limit * BUFFER_SHARE)
+        # Number of times the budget was reached
+        self.exceeded_count = 0
+
+    def exceeded(self, queued_bytes: int) -> bool:
+        """Check if queued rows of queued_bytes reach their share of the budget."""
+        if queued_bytes >= self.buffer_limit:
+            self.exceeded_count += 1
+            return True
+        return False
+
+    def summary(self) -> str:
+        """Describe the peak resident set size against the budget."""
+        return (f"Peak RSS: {peak_rss() / 1048576:.1f} MB, limit {self.limit / 1048576:.0f} MB, "
+                f"buffers flushed {self.exceeded_count} times at {self.buffer_limit / 1048576:.1f} MB of queued rows")
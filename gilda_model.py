@@ -0,0 +1,214 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+
+
+class EnumValue:
+    """Enumerated value of a parameter field."""
+
+    __slots__ = ("value", "definition", "comment")
+
+    def __init__(self, value, definition, comment):
+        self.value = value
+        self.definition = definition
+        self.comment = comment
+
+
+class Field:
+    """Parameter field of a data structure, Offset and Size in bytes."""
+
+    __slots__ = ("id", "name", "ref_eng_name", "size", "offset", "type", "unit", "partition", "structure",
+                 "description", "min", "max", "low_bit", "high_bit", "comment", "enums")
+
+    def __init__(self, row, structure):
+        (self.id, self.name, self.ref_eng_name, self.size, self.offset, self.type, self.unit, self.partition,
+         _structure_id, self.description, self.min, self.max, self.low_bit, self.high_bit, self.comment) = row
+        self.structure = structure
+        # Enum values by value, None for non enumerated fields
+        self.enums = None
+
+    @property
+    def bitfield(self):
+        """Bit range (LowBit, HighBit) of the field, None when the whole field is used."""
+        if self.low_bit is None or self.high_bit is None:
+            return None
+        return (self.low_bit, self.high_bit)
+
+
+class Structure:
+    """Data structure with its parameter fields ordered by offset."""
+
+    __slots__ = ("id", "name", "partition", "channel", "source_file", "fields")
+
+    def __init__(self, row):
+        self.id, self.name, self.partition, self.channel, self.source_file = row
+        self.fields = []
+
+
+class ArincParameter:
+    """ARINC parameter of a FIFO parameter field, Offset is the 1-based bit number of its least significant bit."""
+
+    __slots__ = ("field", "label", "name", "description", "type", "offset", "length", "unit", "min", "max", "scale",
+                 "discretes")
+
+    def __init__(self, row, field):
+        (_field_id, self.label, self.name, self.description, self.type, self.offset, self.length, self.unit,
+         self.min, self.max, self.scale) = row
+        self.field = field
+        # Discrete names by value
+        self.discretes = None
+
+
+class GildaModel:
+    """
+    Read-only model of a GILDA database, loaded at once.
+    Structures are indexed by name and channel, fields by name and RefEngName, ARINC parameters by FIFO field.
+    """
+
+    __slots__ = ("path", "mtime", "structures", "structures_by_name", "structures_by_channel", "fields_by_id",
+                 "fields_by_name", "fields_by_ref_eng_name", "arinc", "buses")
+
+    def __init__(self, path: str, mtime: int):
+        self.path = path
+        self.mtime = mtime
+        self.structures = []
+        self.structures_by_name = {}
+        # The structure with the lowest ID wins if several share a channel
+        self.structures_by_channel = {}
+        self.fields_by_id = {}
+        self.fields_by_name = {}
+        self.fields_by_ref_eng_name = {}
+        # ARINC parameters by FIFO parameter field ID
+        self.arinc = {}
+        # FIFO parameter fields by RefEngName, the one owning ARINC parameters if several share a name
+        self.buses = {}
+
+    def load(self, connection):
+        """Load all structures, fields, enum values and ARINC parameters from a database connection."""
+        cursor = connection.cursor()
+        structures_by_id = {}
+        # Databases created before the import manifest have no source files
+        columns = [r[1] for r in cursor.execute("PRAGMA table_info(DataStructures);")]
+        if "SourceFile" in columns:
+            rows = cursor.execute(
+                """SELECT ds.Id, ds.EngName, pl.Name, ds.Channel, m.Path FROM DataStructures ds
+                 LEFT JOIN PartitionList pl ON ds.SourcePartition = pl.Id
+                 LEFT JOIN ImportManifest m ON ds.SourceFile = m.Id
+                 ORDER BY ds.Id;"""
+            )
+        else:
+            rows = cursor.execute(
+                """SELECT ds.Id, ds.EngName, pl.Name, ds.Channel, NULL FROM DataStructures ds
+                 LEFT JOIN PartitionList pl ON ds.SourcePartition = pl.Id
+                 ORDER BY ds.Id;"""
+            )
+        for row in rows:
+            structure = Structure(row)
+            self.structures.append(structure)
+            structures_by_id[structure.id] = structure
+            self.structures_by_name[structure.name] = structure
+            if structure.channel is not None:
+                self.structures_by_channel.setdefault(structure.channel, structure)
+
+        rows = cursor.execute(
+            """SELECT pf.Id, pf.Name, pf.RefEngName, pf.Size, pf.Offset, pt.Type, pu.Unit, pl.Name, pf.DataStructure,
+             pf.Description, pf.Min, pf.Max, pf.LowBit, pf.HighBit, pf.Comment
+             FROM ParameterFields pf
+             LEFT JOIN ParameterTypes pt ON pf.Type = pt.Id
+             LEFT JOIN ParameterUnits pu ON pf.Unit = pu.Id
+             LEFT JOIN PartitionList pl ON pf.SourcePartition = pl.Id
+             ORDER BY pf.DataStructure, pf.Offset, pf.Id;"""
+        )
+        for row in rows:
+            structure = structures_by_id.get(row[8])
+            field = Field(row, structure)
+            if structure is not None:
+                structure.fields.append(field)
+            self.fields_by_id[field.id] = field
+            self.fields_by_name[field.name] = field
+            if field.ref_eng_name:
+                self.fields_by_ref_eng_name.setdefault(field.ref_eng_name, []).append(field)
+                # The importer files ARINC parameters under the last FIFO field of a RefEngName
+                bus = self.buses.get(field.ref_eng_name)
+                if field.type == "fifo" and (bus is None or field.id > bus.id):
+                    self.buses[field.ref_eng_name] = field
+
+        rows = cursor.execute(
+            """SELECT ev.ParameterField, ev.Value, d.Definition, d.Comment FROM ParameterEnumValues ev
+             JOIN ParameterEnumDefinitions d ON ev.Definition = d.Id
+             ORDER BY ev.ParameterField, ev.Value;"""
+        )
+        for field_id, value, definition, comment in rows:
+            field = self.fields_by_id.get(field_id)
+            if field is None:
+                continue
+            if field.enums is None:
+                field.enums = {}
+            field.enums[value] = EnumValue(value, definition, comment)
+
+        discretes = {}
+        rows = cursor.execute("SELECT ParameterFieldsId, Label, Offset, Value, Name FROM ArincDiscretes;")
+        for field_id, label, offset, value, name in rows:
+            discretes.setdefault((field_id, label, offset), {})[value] = name
+
+        rows = cursor.execute(
+            """SELECT pa.ParameterFieldsId, pa.Label, pa.Name, pa.Description, pt.Type, pa.Offset, pa.Length, pu.Unit,
+             pa.Min, pa.Max, pa.ScaleFactor
+             FROM ParameterArinc pa
+             LEFT JOIN ParameterTypes pt ON pa.Type = pt.Id
+             LEFT JOIN ParameterUnits pu ON pa.Unit = pu.Id
+             ORDER BY pa.ParameterFieldsId, pa.Label, pa.Offset;"""
+        )
+        for row in rows:
+            parameter = ArincParameter(row, self.fields_by_id.get(row[0]))
+            parameter.discretes = discretes.get((row[0], parameter.label, parameter.offset))
+            self.arinc.setdefault(row[0], []).append(parameter)
+        # A bus name resolves to the field that owns its ARINC parameters
+        for field_id in self.arinc:
+            field = self.fields_by_id.get(field_id)
+            if field is not None and field.ref_eng_name:
+                self.buses[field.ref_eng_name] = field
+        cursor.close()
+
+
+# Loaded models by resolved database path
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(database_path: str) -> GildaModel:
+    """
+    Return the model of a GILDA database, loading it on first use.
+    A model is shared by all callers and loaded again when the database file was modified.
+    """
+    path = str(Path(database_path).resolve())
+    mtime = os.stat(path).st_mtime_ns
+    with _models_lock:
+        model = _models.get(path)
+        if model is not None and model.mtime == mtime:
+            return model
+        model = GildaModel(path, mtime)
+        # Read-only, a missing file is not created
+        with closing(sqlite3.connect(f"{Path(path).as_uri()}?mode=ro", uri=True)) as connection:
+            model.load(connection)
+        _models[path] = model
+        return model
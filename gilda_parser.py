@@ -18,14 +18,20 @@
 # along with GILDA parser. If not, see http://www.gnu.org/licenses/.
 #
 import argparse
+import cProfile
 import os
+import shutil
 import signal
+import sqlite3
 import sys
 from pathlib import Path
 from rich.progress import Progress, MofNCompleteColumn
-from database import Database
-from gilda_xml import GildaChannelsXml, GildaXml
+from database import PROFILES, Database, describe_violation, has_gilda_schema
+from gilda_xml import ENGINES, GildaChannelsXml, GildaXml, read_structures_parallel
 from gilda_arinc import GildaArinc
+from gilda_manifest import GildaManifest
+from gilda_memory import MemoryBudget
+from gilda_profile import GildaProfiler
 
 __author__ = "Michael Wolf aka Mictronics"
 __copyright__ = "2025, (C) Michael Wolf"
@@ -80,6 +86,117 @@ def initArgParser(parser=None):
             dest="arinc_conf",
         )
 
+        parser.add_argument(
+            "-b",
+            "--bulk",
+            help="Commit each input file in a single transaction and roll it back on error.",
+            action="store_true",
+            default=False,
+        )
+
+        parser.add_argument(
+            "--checkpoint",
+            metavar="ROWS",
+            help="Commit intermediate results every ROWS rows in bulk mode. Default 0 (disabled).",
+            default=0,
+            type=int,
+        )
+
+        parser.add_argument(
+            "--no-optimize",
+            help="Skip PRAGMA optimize and VACUUM at the end of the import.",
+            action="store_true",
+            default=False,
+        )
+
+        parser.add_argument(
+            "--engine",
+            help="XML engine used to read GILDA export files. Default 'iterparse'.",
+            choices=ENGINES,
+            default="iterparse",
+        )
+
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            metavar="N",
+            help="Read GILDA XML and ARINC fido files with N worker processes. Default 1.",
+            default=1,
+            type=int,
+        )
+
+        parser.add_argument(
+            "-i",
+            "--incremental",
+            help="Import only XML files changed since the last import.",
+            action="store_true",
+            default=False,
+        )
+
+        parser.add_argument(
+            "--prune",
+            help="With --incremental, delete data of XML files no longer found in the input path.",
+            action="store_true",
+            default=False,
+        )
+
+        parser.add_argument(
+            "--fk-check",
+            help="Check foreign keys once at the end of the import, of the written tables after each file, or never. "
+            "'file' commits each file in a single transaction, like --bulk, and is not combinable with --checkpoint. "
+            "Default 'end'.",
+            choices=("end", "file", "off"),
+            default="end",
+        )
+
+        parser.add_argument(
+            "--profile",
+            metavar="REPORT",
+            help="Record time, calls and rows per import stage and file, print a summary and write a JSON report.",
+            default=None,
+            type=str,
+        )
+
+        parser.add_argument(
+            "--profile-stats",
+            metavar="FILE",
+            help="Write cProfile statistics of the import for analysis with pstats.",
+            default=None,
+            type=str,
+        )
+
+        parser.add_argument(
+            "--sqlite-profile",
+            help="SQLite connection profile, 'bulk-build' trades crash safety for speed. Default 'safe'.",
+            choices=PROFILES.keys(),
+            default="safe",
+        )
+
+        parser.add_argument(
+            "--atomic",
+            help="Build into a temporary copy of the output database and rename it into place when done.",
+            action="store_true",
+            default=False,
+        )
+
+        parser.add_argument(
+            "-m",
+            "--memory",
+            help="Build the database in memory and write it to the output in one step when done. "
+            "A missing output database is created.",
+            action="store_true",
+            default=False,
+        )
+
+        parser.add_argument(
+            "--memory-limit",
+            metavar="MB",
+            help="Keep the import below MB megabytes of memory, flushing queued rows when the limit is reached. "
+            "Uses the iterparse engine, not combinable with --memory and --jobs.",
+            default=None,
+            type=int,
+        )
+
         parser.set_defaults(deprecated=None)
         parser.add_argument("--version", action="version",
                             version=f"{__version__}")
@@ -92,6 +209,121 @@ def initArgParser(parser=None):
     return args
 
 
+def discover_files(input_path, arinc_conf=None):
+    """
+    Scan the input directory once and sort files into work queues.
+    Returns lists of channel, structure and ARINC configuration files in directory order.
+    """
+    work = {"channels": [], "structures": [], "arinc": []}
+    directories = [input_path]
+    while len(directories) > 0:
+        with os.scandir(directories.pop()) as entries:
+            entries = sorted(entries, key=lambda e: e.name)
+        subdirectories = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif entry.is_dir():
+                # Symlinked directories are not followed, like os.walk, so links can not loop
+                continue
+            elif entry.name.lower() == "channels.xml":
+                work["channels"].append(entry.path)
+            elif entry.name == arinc_conf:
+                work["arinc"].append(entry.path)
+            elif entry.name.endswith((".XML", ".xml")):
+                work["structures"].append(entry.path)
+        # Depth first, in name order like a sorted os.walk
+        directories.extend(reversed(subdirectories))
+    return work
+
+
+def read_create_sql():
+    """Read the database creation script, None if it is not available."""
+    sql_file_path = Path(__file__).parent / "create_gilda_database.sql"
+    # Check if SQL file exists
+    if not sql_file_path.is_file():
+        print(
+            f"SQL file for database creation not found: '{sql_file_path}'")
+        return None
+    # Read SQL file content
+    try:
+        with sql_file_path.open("r", encoding="utf-8") as f:
+            return f.read()
+    except Exception as e:
+        print(f"Failed to read SQL file '{sql_file_path}': {e}")
+        return None
+
+
+def run_import(args, db, profiler=None, memory_budget=None):
+    """Import all input files into an open database, returns foreign key violations."""
+    if memory_budget is not None:
+        # Leave a quarter of the budget to the SQLite page cache, queued rows are bounded by the database
+        db.set_cache_size(memory_budget.limit // 4096)
+        db.memory_budget = memory_budget
+    with Progress(*Progress.get_default_columns(), MofNCompleteColumn(), transient=True) as progress:
+        if profiler is not None:
+            profiler.connection = db.database
+            profiler.instrument(db)
+        db.upgrade_schema()
+        # Find all input files with a single pass over the input directory
+        work = discover_files(args.input, args.arinc_conf)
+
+        # First need the channels before processing channel XML files
+        # Found channel IDs will be assigned to existing data structures
+        ch_task = progress.add_task("[green]Channels", total=len(work["channels"]))
+        with GildaChannelsXml(db, fk_check=args.fk_check == "file") as xml:
+            if profiler is not None:
+                profiler.instrument(xml, ("parse",), per_file=True)
+            for file_path in work["channels"]:
+                xml.parse(file_path)
+                progress.update(ch_task, advance=1)
+        progress.remove_task(ch_task)
+
+        # Process GILDA XML files from input path
+        xml_files = work["structures"]
+        # Skip files unchanged since the last import in incremental mode
+        manifest = GildaManifest(db, args.input, args.incremental)
+        xml_files = [file_path for file_path in xml_files if manifest.changed(file_path)]
+        if args.prune:
+            print(f"Removed data of {manifest.remove_missing()} deleted XML files.")
+        xml_task = progress.add_task("[red]XML", total=len(xml_files))
+        # Workers only read the XML files, this process resolves IDs and writes
+        if args.jobs > 1:
+            xml_work = read_structures_parallel(xml_files, args.engine, args.jobs)
+        else:
+            xml_work = ((file_path, None) for file_path in xml_files)
+        with GildaXml(db, args.structures, engine=args.engine, fk_check=args.fk_check == "file") as xml:
+            if profiler is not None:
+                profiler.instrument(xml, ("parse",), per_file=True)
+            for file_path, records in xml_work:
+                if xml.parse(file_path, records, manifest.begin(file_path)):
+                    manifest.complete(file_path)
+                    db.commit(force=True)
+                progress.update(xml_task, advance=1)
+        progress.remove_task(xml_task)
+
+        if args.arinc_conf is not None:
+            arinc_task = progress.add_task("[blue]ARINC", total=len(work["arinc"]))
+            with GildaArinc(db, jobs=args.jobs) as arinc:
+                if profiler is not None:
+                    profiler.instrument(arinc, ("parse",), per_file=True)
+                for file_path in work["arinc"]:
+                    arinc.parse(file_path)
+                    progress.update(arinc_task, advance=1)
+            progress.remove_task(arinc_task)
+
+        # Search tables are rebuilt once all data is imported
+        try:
+            db.build_search_index()
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search index not built: {e}")
+
+    # Validate all relations once for the whole import
+    if args.fk_check == "end":
+        return db.foreign_key_check()
+    return []
+
+
 def main():
     """Main program function"""
     # Setup signal handlers for graceful termination
@@ -114,19 +346,8 @@ def main():
 
     # Handle database creation when [--create] was given
     if args.create is not None:
-        sql_file_path = Path(__file__).parent / "create_gilda_database.sql"
-        # Check if SQL file exists
-        if not sql_file_path.is_file():
-            print(
-                f"SQL file for database creation not found: '{sql_file_path}'")
-            sys.exit(1)
-        # Read SQL file content
-        create_sql = None
-        try:
-            with sql_file_path.open("r", encoding="utf-8") as f:
-                create_sql = f.read()
-        except Exception as e:
-            print(f"Failed to read SQL file '{sql_file_path}': {e}")
+        create_sql = read_create_sql()
+        if create_sql is None:
             sys.exit(1)
         # Create the database
         with Database(args.create) as db:
@@ -138,44 +359,86 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    with Progress(*Progress.get_default_columns(), MofNCompleteColumn(), transient=True) as progress:
-        total = 0
-        # First need the channels before processing channel XML files
-        # Found channel IDs will be assigned to existing data structures
-        ch_task = progress.add_task("[green]Channels", total=total)
-        for root, _dirs, files in os.walk(args.input):
-            total += len(files)
-            progress.update(ch_task, total=total)
-            for file in files:
-                progress.update(ch_task, advance=1)
-                if file.lower() == "channels.xml":
-                    file_path = os.path.join(root, file)
-                    with GildaChannelsXml(args.output) as xml:
-                        xml.parse(file_path)
-        progress.remove_task(ch_task)
+    if args.prune and not args.incremental:
+        print("--prune requires --incremental.")
+        sys.exit(1)
 
-        # Process GILDA XML files from input path
-        # Walk through the input directory and find XML files
-        xml_task = progress.add_task("[red]XML", total=total)
-        for root, _dirs, files in os.walk(args.input):
-            for file in files:
-                progress.update(xml_task, advance=1)
-                if file.endswith((".XML", ".xml")):
-                    file_path = os.path.join(root, file)
-                    with GildaXml(args.output, args.structures) as xml:
-                        xml.parse(file_path)
-        progress.remove_task(xml_task)
+    # A file failing the foreign key check is rolled back, so it must not be committed before
+    if args.fk_check == "file":
+        if args.checkpoint > 0:
+            print("--fk-check file can not be combined with --checkpoint, each file is committed as a whole.")
+            sys.exit(1)
+        args.bulk = True
 
-        if args.arinc_conf is not None:
-            arinc_task = progress.add_task("[blue]ARINC", total=total)
-            for root, _dirs, files in os.walk(args.input):
-                for file in files:
-                    progress.update(arinc_task, advance=1)
-                    if file == args.arinc_conf:
-                        file_path = os.path.join(root, file)
-                        with GildaArinc(args.output) as arinc:
-                            arinc.parse(file_path)
-            progress.remove_task(arinc_task)
+    memory_budget = None
+    if args.memory_limit is not None:
+        if args.memory:
+            print("Memory limit can not be combined with --memory, the whole database is held in memory.")
+            sys.exit(1)
+        if args.jobs > 1:
+            print("Memory limit can not be combined with --jobs, workers hold whole files in memory.")
+            sys.exit(1)
+        # Only iterparse streams one structure at a time
+        args.engine = "iterparse"
+        memory_budget = MemoryBudget(args.memory_limit)
+
+    profiler = GildaProfiler() if args.profile is not None else None
+    stats = cProfile.Profile() if args.profile_stats is not None else None
+    if stats is not None:
+        stats.enable()
+
+    # Only in-memory builds create the schema of a missing output, otherwise it must exist already
+    if not (args.memory and not os.path.isfile(args.output)) and not has_gilda_schema(args.output):
+        print(f"Database {args.output} has no GILDA schema, run with --create first.")
+        sys.exit(1)
+
+    # Build into a temporary copy next to the output, readers never see a half-built database
+    output = args.output
+    if args.atomic:
+        output = f"{args.output}.{os.getpid()}.tmp"
+        if os.path.isfile(args.output):
+            shutil.copyfile(args.output, output)
+
+    create_sql = None
+    if args.memory and not os.path.isfile(output):
+        create_sql = read_create_sql()
+        if create_sql is None:
+            sys.exit(1)
+
+    try:
+        # One database session is shared by all parsers for the whole run.
+        # Optimize and VACUUM run once when it is closed.
+        with Database(output, args.bulk, args.checkpoint, not args.no_optimize, profile=args.sqlite_profile,
+                      memory=args.memory) as db:
+            if create_sql is not None:
+                db.create(create_sql)
+            violations = run_import(args, db, profiler, memory_budget)
+        # A build with foreign key violations does not replace the live database
+        if args.atomic and len(violations) == 0:
+            os.replace(output, args.output)
+        elif args.atomic:
+            print(f"Foreign key check failed, {args.output} is left unchanged.")
+    finally:
+        if args.atomic:
+            for path in (output, f"{output}-journal"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    if memory_budget is not None:
+        print(memory_budget.summary())
+
+    if stats is not None:
+        stats.disable()
+        stats.dump_stats(args.profile_stats)
+    if profiler is not None:
+        profiler.print_summary()
+        profiler.write(args.profile)
+
+    if len(violations) > 0:
+        print(f"Foreign key violations: {len(violations)}")
+        for v in violations:
+            print(f"  {describe_violation(v)}")
+        sys.exit(1)
 
     sys.exit(0)  # Exit the program
 
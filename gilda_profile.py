@@ -0,0 +1,111 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import functools
+import inspect
+import json
+import time
+from rich.console import Console
+from rich.table import Table
+
+
+class GildaProfiler:
+    """Record wall time, call and row counts of import stages and files."""
+
+    def __init__(self, connection=None):
+        # SQLite connection used to count written rows
+        self.connection = connection
+        self.stages = {}
+        self.files = {}
+        # Time spent in nested stages, to get the exclusive time of each stage
+        self.children = []
+
+    def rows(self):
+        """Return the total number of rows written on the connection so far."""
+        if self.connection is None:
+            return 0
+        return self.connection.total_changes
+
+    def record(self, stage, seconds, self_seconds, rows, file=None):
+        """Add one call of a stage."""
+        entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0, "self_seconds": 0.0, "rows": 0})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["self_seconds"] += self_seconds
+        entry["rows"] += rows
+        if file is not None:
+            entry = self.files.setdefault(str(file), {"stage": stage, "seconds": 0.0, "self_seconds": 0.0, "rows": 0})
+            entry["seconds"] += seconds
+            entry["self_seconds"] += self_seconds
+            entry["rows"] += rows
+
+    def wrap(self, stage, function, per_file=False):
+        """Return function wrapped to record its calls as stage, optionally per file given as first argument."""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            self.children.append(0.0)
+            rows = self.rows()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                child_seconds = self.children.pop()
+                if len(self.children) > 0:
+                    self.children[-1] += seconds
+                file = args[0] if per_file and len(args) > 0 else None
+                self.record(stage, seconds, seconds - child_seconds, self.rows() - rows, file)
+        return wrapper
+
+    def instrument(self, obj, methods=None, per_file=False):
+        """Replace public methods of an object, or the given ones, with recording wrappers."""
+        if methods is None:
+            methods = [
+                name for name, _f in inspect.getmembers(type(obj), inspect.isfunction) if not name.startswith("_")
+            ]
+        for name in methods:
+            setattr(obj, name, self.wrap(f"{type(obj).__name__}.{name}", getattr(obj, name), per_file))
+        return obj
+
+    def report(self):
+        """Return the recorded profile as a JSON serializable dictionary."""
+        return {"stages": self.stages, "files": self.files}
+
+    def write(self, path):
+        """Write the recorded profile as JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def print_summary(self, console=None):
+        """Print a table of all stages sorted by exclusive time."""
+        if console is None:
+            console = Console()
+        table = Table(title="Import profile")
+        table.add_column("Stage")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total s", justify="right")
+        table.add_column("Self s", justify="right")
+        table.add_column("Rows", justify="right")
+        for stage, entry in sorted(self.stages.items(), key=lambda s: s[1]["self_seconds"], reverse=True):
+            table.add_row(
+                stage,
+                str(entry["calls"]),
+                f"{entry['seconds']:.3f}",
+                f"{entry['self_seconds']:.3f}",
+                str(entry["rows"]),
+            )
+        console.print(table)
@@ -15,227 +15,344 @@
 # You should have received a copy of the GNU General Public License
 # along with GILDA parser. If not, see http://www.gnu.org/licenses/.
 #
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import Element
+from defusedxml import ElementTree
 from defusedxml.minidom import parse
-from database import Database
+from database import Database, describe_violation
+
+# Available XML engines, streaming iterparse is the default
+ENGINES = ("iterparse", "minidom")
 
 
 class GildaXml:
     """GILDA XML parser class."""
 
-    def __init__(self, database_path: str, structures: bool = False):
-        # Initialize database connection
-        self.database = Database(database_path)
+    def __init__(self, database: str | Database, structures: bool = False, bulk: bool = False, checkpoint: int = 0,
+                 engine: str = "iterparse", fk_check: bool = True):
+        # Use a shared database session or open a private connection
+        self.shared = isinstance(database, Database)
+        if self.shared:
+            self.database = database
+        else:
+            self.database = Database(database, bulk, checkpoint)
         self.structures = structures
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown XML engine '{engine}'.")
+        self.engine = engine
+        # Check foreign keys of the written tables after each file
+        self.fk_check = fk_check
+        # Channel IDs by description, loaded once on first use
+        self.channels = None
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        # Close database connection
-        self.database.close()
+        # Close database connection, a shared session is closed by its owner
+        if not self.shared:
+            self.database.close()
 
-    def is_binary_string(self, s):
+    @staticmethod
+    def is_binary_string(s):
         """Check if a string is a binary representation (only '0' and '1')."""
         return set(s).issubset({"0", "1"})
 
-    def parse(self, file=None):
-        """Parse a GILDA XML file and insert data into the database."""
+    def parse(self, file=None, records=None, source_file=None) -> bool:
+        """
+        Parse a GILDA XML file and insert data into the database.
+        Structure records already read from the file, e.g. by read_structures_parallel(), may be given.
+        Inserted structures are linked to the import manifest entry source_file.
+        Returns True when the file was imported without errors.
+        """
         if file is None:
-            return
+            return False
+        self.source_file = source_file
         # Get static mapping of existing data from the database
         # Avoids queries for each item, improves performance
-        partitions = self.database.get_partitions()
-        types = self.database.get_types()
-        units = self.database.get_units()
-        definitions = self.database.get_enum_definitions()
-        data_structures = self.database.get_structures()
+        self.partitions = self.database.get_partitions()
+        self.types = self.database.get_types()
+        self.units = self.database.get_units()
+        self.definitions = self.database.get_enum_definitions()
+        self.data_structures = self.database.get_structures()
+        if self.channels is None:
+            self.channels = self.database.get_channels()
 
         try:
-            # Parse the XML file
-            document = parse(file)
-            # Extract structures and fields
-            structures = document.getElementsByTagName("Structure")
-            for struct in structures:
-                # Handle data structure
-                if struct.hasAttribute("EngName") and struct.hasAttribute(
-                    "EmittedByPartition"
-                ):
-                    eng_name = struct.getAttribute("EngName").strip()
-                    src_partition = partitions[
-                        struct.getAttribute("EmittedByPartition")
-                    ]
-                    # Insert or update the data structure in the database
-                    struct_id = None
-                    if eng_name not in data_structures or self.structures is True:
-                        struct_data = {
-                            "name": eng_name,
-                            "src_partition": src_partition,
-                            "channel_id": None,
-                        }
-                        # Query channel ID for structure only if inserting new structure
-                        ch_id = self.database.get_channel_id(eng_name)
-                        if ch_id is not None:
-                            struct_data["channel_id"] = ch_id
-                        struct_id = self.database.insert_structure(struct_data)
-                        data_structures[eng_name] = struct_id
-                    else:
-                        # Update existing structure
-                        struct_id = data_structures[eng_name]
-                    # Validate that the structure exists
-                    if struct_id is None:
-                        raise ValueError(
-                            f"Data structure '{eng_name}' could not be found in database."
-                        )
-                    # Handle fields associated with the structure
-                    fields = struct.getElementsByTagName("Field")
-                    for field in fields:
-                        if field.hasAttribute("Name"):
-                            field_data = {
-                                "structure_id": struct_id,
-                                "name": field.getAttribute("Name"),
-                                "size": int(field.getAttribute("Size")),
-                                "offset": int(field.getAttribute("Offset")),
-                                "src_partition": src_partition,
-                                "description": (
-                                    field.getAttribute("Description")
-                                    if field.hasAttribute("Description")
-                                    else None
-                                ),
-                                "min": None,
-                                "max": None,
-                                "low_bit": None,
-                                "high_bit": None,
-                                "comment": None,
-                                "eng_name": None,
-                            }
-                            bits = field.getElementsByTagName("BitField")
-                            if len(bits) > 0:
-                                bitrange = bits[0]
-                                if bitrange.hasAttribute(
-                                    "LowBit"
-                                ) and bitrange.hasAttribute("HighBit"):
-                                    field_data["low_bit"] = bitrange.getAttribute(
-                                        "LowBit"
-                                    ).strip()
-                                    field_data["high_bit"] = bitrange.getAttribute(
-                                        "HighBit"
-                                    ).strip()
-                            # Process NonEnumerate types and units
-                            # Populate types and units if not already present
-                            non_enums = field.getElementsByTagName(
-                                "NonEnumerate")
-                            for ne in non_enums:
-                                if ne.hasAttribute("Type"):
-                                    type = ne.getAttribute("Type").strip()
-                                    if type not in types:
-                                        # Insert new type into the database
-                                        id = self.database.insert_type(type)
-                                        types[type] = id
-
-                                if ne.hasAttribute("Unit"):
-                                    unit = ne.getAttribute("Unit").strip()
-                                    if unit not in units:
-                                        # Insert new unit into the database
-                                        id = self.database.insert_unit(unit)
-                                        units[unit] = id
-                                # Insert new parameter field into the database
-                                field_data["eng_name"] = ne.getAttribute(
-                                    "RefEngName"
-                                ).strip()
-                                field_data["unit"] = units[unit]
-                                field_data["type"] = types[type]
-                                # Get optional limits for parameter
-                                dom = ne.getElementsByTagName("UsageDomain")
-                                if len(dom) > 0:
-                                    usage = dom[0]
-                                    if usage.hasAttribute("Min") and usage.hasAttribute(
-                                        "Max"
-                                    ):
-                                        field_data["min"] = usage.getAttribute(
-                                            "Min"
-                                        ).strip()
-                                        field_data["max"] = usage.getAttribute(
-                                            "Max"
-                                        ).strip()
-                                # Finally insert the field
-                                self.database.insert_field(field_data)
-
-                            # Process Enumerate types
-                            enums = field.getElementsByTagName("Enumerate")
-                            # Both Enumerate and NonEnumerate should not be present simultaneously
-                            if len(enums) > 0:
-                                if len(non_enums) > 0:
-                                    raise ValueError(
-                                        f"Field '{field.getAttribute('Name')}' has both Enumerate and NonEnumerate definitions."
-                                    )
-
-                                field_data["unit"] = units["unitless"]
-                                field_data["type"] = types["enum"]
-                                field_id = self.database.insert_field(
-                                    field_data)
-
-                                for en in enums:
-                                    if en.hasAttribute("Value") and en.hasAttribute(
-                                        "Definition"
-                                    ):
-                                        definition = en.getAttribute(
-                                            "Definition"
-                                        ).strip()
-                                        comment = (
-                                            en.getAttribute("Comments").strip()
-                                            if en.hasAttribute("Comments")
-                                            else ""
-                                        )
-                                        if definition not in definitions:
-                                            data = {
-                                                "definition": definition,
-                                                "comment": comment,
-                                            }
-                                            # Insert new definition into the database
-                                            def_id = (
-                                                self.database.insert_enum_definition(
-                                                    data
-                                                )
-                                            )
-                                            definitions[definition] = def_id
-                                        else:
-                                            def_id = definitions[definition]
-
-                                        # Validate that the enumeration value is a binary string
-                                        if (
-                                            self.is_binary_string(
-                                                en.getAttribute("Value")
-                                            )
-                                            is False
-                                        ):
-                                            raise ValueError(
-                                                f"Enumerate value '{en.getAttribute('Value')}' in field '{field.getAttribute('Name')}' is not a valid binary string."
-                                            )
-                                        enum_value = {
-                                            "field_id": field_id,
-                                            "definition_id": def_id,
-                                            "value": int(
-                                                en.getAttribute("Value"), base=2
-                                            ),
-                                        }
-                                        self.database.insert_enum_value(
-                                            enum_value)
-
-            if self.database.foreign_key_check() > 0:
-                raise ValueError("Error in foreign key relation!")
+            # Read the XML file structure by structure and store each one
+            if records is None:
+                records = read_structures(file, self.engine)
+            for record in records:
+                self.store_structure(record)
+            # Write remaining queued rows
+            self.database.flush()
+
+            self.check_foreign_keys(("DataStructures", "ParameterFields", "ParameterEnumValues"))
+            # Bulk mode commits the whole file at once
+            self.database.commit(force=True)
 
         except Exception as e:
             print(f"Error in '{file}': {e}")
+            self.database.rollback()
+            return False
+
+        return True
+
+    def check_foreign_keys(self, tables):
+        """Raise an error listing foreign key violations in the given tables, if enabled."""
+        if not self.fk_check:
             return
+        violations = self.database.foreign_key_check(tables)
+        if len(violations) > 0:
+            raise ValueError(
+                "Error in foreign key relation! " + "; ".join(describe_violation(v) for v in violations)
+            )
 
-        return
+    def store_structure(self, record):
+        """Insert a structure record from read_structures() into the database."""
+        eng_name = record["name"]
+        src_partition = self.partitions[record["partition"]]
+        # Insert or update the data structure in the database
+        struct_id = None
+        if eng_name not in self.data_structures or self.structures is True:
+            struct_data = {
+                "name": eng_name,
+                "src_partition": src_partition,
+                "channel_id": None,
+                "source_file": self.source_file,
+            }
+            # Link channel ID for structure only if inserting new structure
+            struct_data["channel_id"] = self.channels.get(eng_name)
+            struct_id = self.database.insert_structure(struct_data)
+            self.data_structures[eng_name] = struct_id
+        else:
+            # Update existing structure
+            struct_id = self.data_structures[eng_name]
+        # Validate that the structure exists
+        if struct_id is None:
+            raise ValueError(
+                f"Data structure '{eng_name}' could not be found in database."
+            )
+        # Handle fields associated with the structure
+        for field in record["fields"]:
+            field_data = {
+                "structure_id": struct_id,
+                "name": field["name"],
+                "size": field["size"],
+                "offset": field["offset"],
+                "src_partition": src_partition,
+                "description": field["description"],
+                "min": None,
+                "max": None,
+                "low_bit": field["low_bit"],
+                "high_bit": field["high_bit"],
+                "comment": None,
+                "eng_name": None,
+            }
+            # Process NonEnumerate types and units
+            # Populate types and units if not already present
+            for ne in field["non_enums"]:
+                type = ne["type"]
+                if type is not None and type not in self.types:
+                    # Insert new type into the database
+                    self.types[type] = self.database.insert_type(type)
+                unit = ne["unit"]
+                if unit is not None and unit not in self.units:
+                    # Insert new unit into the database
+                    self.units[unit] = self.database.insert_unit(unit)
+                # Insert new parameter field into the database
+                field_data["eng_name"] = ne["eng_name"]
+                field_data["unit"] = self.units[unit]
+                field_data["type"] = self.types[type]
+                # Get optional limits for parameter
+                if ne["min"] is not None:
+                    field_data["min"] = ne["min"]
+                    field_data["max"] = ne["max"]
+                # Finally queue the field, the same dict is reused for the next definition
+                self.database.add_field(dict(field_data))
+
+            # Process Enumerate types
+            if field["is_enum"]:
+                field_data["unit"] = self.units["unitless"]
+                field_data["type"] = self.types["enum"]
+                self.database.add_field(field_data)
+
+                for en in field["enums"]:
+                    definition = en["definition"]
+                    if definition not in self.definitions:
+                        data = {
+                            "definition": definition,
+                            "comment": en["comment"],
+                        }
+                        # Insert new definition into the database
+                        self.definitions[definition] = self.database.insert_enum_definition(data)
+                    enum_value = {
+                        "field_name": field["name"],
+                        "definition_id": self.definitions[definition],
+                        "value": en["value"],
+                    }
+                    self.database.add_enum_value(enum_value)
+
+
+def read_structures(file, engine: str = "iterparse"):
+    """
+    Read a GILDA XML file and yield one plain record per data structure.
+    Records hold names instead of database IDs, they are resolved by GildaXml.store_structure().
+    """
+    if engine == "minidom":
+        elements = _iter_structures_minidom(file)
+    else:
+        elements = _iter_structures_iterparse(file)
+    for struct in elements:
+        record = _structure_record(struct)
+        if record is not None:
+            yield record
+
+
+def read_structures_list(file, engine: str = "iterparse"):
+    """Read all structure records of a GILDA XML file, runs in worker processes."""
+    return list(read_structures(file, engine))
+
+
+def read_structures_parallel(files, engine: str = "iterparse", jobs: int = 2):
+    """
+    Read GILDA XML files in worker processes.
+    Yields (file, records) in input order, so a single writer stores them deterministically.
+    Errors of a worker are raised when its records are iterated.
+    """
+    files = iter(files)
+    with ProcessPoolExecutor(jobs) as pool:
+        # Limit the number of files read ahead of the writer
+        pending = deque()
+        for file in files:
+            pending.append((file, pool.submit(read_structures_list, file, engine)))
+            if len(pending) >= 2 * jobs:
+                break
+        while len(pending) > 0:
+            file, future = pending.popleft()
+            yield file, _future_records(future)
+            next_file = next(files, None)
+            if next_file is not None:
+                pending.append((next_file, pool.submit(read_structures_list, next_file, engine)))
+
+
+def _future_records(future):
+    """Defer the result of a worker until the records are iterated."""
+    yield from future.result()
+
+
+def _iter_structures_iterparse(file):
+    """
+    Stream Structure elements from a GILDA XML file.
+    Finished elements are removed from the tree, so only one Structure subtree is held in memory.
+    """
+    stack = []
+    depth = 0
+    for event, elem in ElementTree.iterparse(file, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == "Structure":
+                depth += 1
+            continue
+        stack.pop()
+        if elem.tag == "Structure":
+            depth -= 1
+            yield elem
+        # Drop every finished element outside of a structure
+        if depth == 0 and len(stack) > 0:
+            stack[-1].remove(elem)
+
+
+def _iter_structures_minidom(file):
+    """Load a GILDA XML file into a DOM and yield its Structure elements."""
+    document = parse(file)
+    for struct in document.getElementsByTagName("Structure"):
+        yield _dom_to_element(struct)
+
+
+def _dom_to_element(node):
+    """Convert a minidom element subtree into an ElementTree element."""
+    elem = Element(node.tagName, dict(node.attributes.items()))
+    for child in node.childNodes:
+        if child.nodeType == child.ELEMENT_NODE:
+            elem.append(_dom_to_element(child))
+    return elem
+
+
+def _structure_record(struct):
+    """Extract a Structure element into a plain record, None if it is not a data structure."""
+    if struct.get("EngName") is None or struct.get("EmittedByPartition") is None:
+        return None
+    fields = []
+    for field in struct.iter("Field"):
+        name = field.get("Name")
+        if name is None:
+            continue
+        field_record = {
+            "name": name,
+            "size": int(field.get("Size")),
+            "offset": int(field.get("Offset")),
+            "description": field.get("Description"),
+            "low_bit": None,
+            "high_bit": None,
+            "non_enums": [],
+            "is_enum": False,
+            "enums": [],
+        }
+        bitrange = next(field.iter("BitField"), None)
+        if bitrange is not None and "LowBit" in bitrange.attrib and "HighBit" in bitrange.attrib:
+            field_record["low_bit"] = bitrange.get("LowBit").strip()
+            field_record["high_bit"] = bitrange.get("HighBit").strip()
+
+        for ne in field.iter("NonEnumerate"):
+            ne_record = {
+                "type": ne.get("Type").strip() if "Type" in ne.attrib else None,
+                "unit": ne.get("Unit").strip() if "Unit" in ne.attrib else None,
+                "eng_name": ne.get("RefEngName", "").strip(),
+                "min": None,
+                "max": None,
+            }
+            # Optional limits for parameter
+            usage = next(ne.iter("UsageDomain"), None)
+            if usage is not None and "Min" in usage.attrib and "Max" in usage.attrib:
+                ne_record["min"] = usage.get("Min").strip()
+                ne_record["max"] = usage.get("Max").strip()
+            field_record["non_enums"].append(ne_record)
+
+        for en in field.iter("Enumerate"):
+            # Both Enumerate and NonEnumerate should not be present simultaneously
+            if len(field_record["non_enums"]) > 0:
+                raise ValueError(
+                    f"Field '{name}' has both Enumerate and NonEnumerate definitions."
+                )
+            field_record["is_enum"] = True
+            if "Value" not in en.attrib or "Definition" not in en.attrib:
+                continue
+            value = en.get("Value")
+            # Validate that the enumeration value is a binary string
+            if GildaXml.is_binary_string(value) is False:
+                raise ValueError(
+                    f"Enumerate value '{value}' in field '{name}' is not a valid binary string."
+                )
+            field_record["enums"].append({
+                "value": int(value, base=2),
+                "definition": en.get("Definition").strip(),
+                "comment": en.get("Comments", "").strip(),
+            })
+        fields.append(field_record)
+    return {
+        "name": struct.get("EngName").strip(),
+        "partition": struct.get("EmittedByPartition"),
+        "fields": fields,
+    }
 
 
 class GildaChannelsXml(GildaXml):
     """GILDA Channels XML parser class."""
 
-    def __init__(self, database_path: str):
-        super().__init__(database_path)
+    def __init__(self, database: str | Database, bulk: bool = False, checkpoint: int = 0, fk_check: bool = True):
+        super().__init__(database, bulk=bulk, checkpoint=checkpoint, fk_check=fk_check)
 
     def parse(self, file=None):
         """Parse a GILDA Channels XML file and insert data into the database."""
@@ -283,11 +400,13 @@ class GildaChannelsXml(GildaXml):
                         # print(channel_data)
                         self.database.insert_channel(channel_data)
 
-            if self.database.foreign_key_check() > 0:
-                raise ValueError("Error in foreign key relation!")
+            self.check_foreign_keys(("Channels",))
+            # Bulk mode commits the whole file at once
+            self.database.commit(force=True)
 
         except Exception as e:
             print(f"Error in '{file}': {e}")
+            self.database.rollback()
             return
 
         return
@@ -1,4 +1,31 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import mmap
+import struct
+from array import array
 from enum import Enum
+from gilda_model import load_model
+
+# NumPy is only needed for decoding capture files
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class ImtApexHeaderFields(Enum):
@@ -10,3 +37,298 @@ class ImtApexHeaderFields(Enum):
     Time_ms = 11
     Length = 15
     Flags = 17
+
+
+# Header size in bytes, Flags is the last single byte field
+IMT_APEX_HEADER_SIZE = ImtApexHeaderFields.Flags.value + 1
+
+# Unsigned struct codes of the header fields by size, derived from the offsets
+_HEADER_CODES = {1: "B", 2: "H", 4: "I"}
+_HEADER_OFFSETS = [f.value for f in ImtApexHeaderFields] + [IMT_APEX_HEADER_SIZE]
+_HEADER_FORMAT = "".join(_HEADER_CODES[b - a] for a, b in zip(_HEADER_OFFSETS, _HEADER_OFFSETS[1:]))
+
+# Struct codes of payload words by size, signed and unsigned
+_INT_CODES = {1: ("b", "B"), 2: ("h", "H"), 4: ("i", "I"), 8: ("q", "Q")}
+_FLOAT_CODES = {4: "f", 8: "d"}
+
+# NumPy dtypes of the struct codes, byte order is prefixed
+_NUMPY_TYPES = {"b": "i1", "B": "u1", "h": "i2", "H": "u2", "i": "i4", "I": "u4", "q": "i8", "Q": "u8",
+                "f": "f4", "d": "f8"}
+
+
+def _field_kind(type_name: str) -> str:
+    """Map a GILDA parameter type name to the way its value is decoded."""
+    name = (type_name or "").lower()
+    if name == "enum":
+        return "enum"
+    if name == "bool":
+        return "bool"
+    if name.startswith(("float", "real", "double")):
+        return "float"
+    if name.startswith(("int", "sint", "signed")):
+        return "signed"
+    return "unsigned"
+
+
+class DecodePlan:
+    """
+    Compiled decoder of one data structure.
+    Fields are read with one struct per group of non-overlapping payload words.
+    """
+
+    __slots__ = ("structure_id", "name", "byte_order", "groups", "words", "fields", "dtype")
+
+    def __init__(self, structure, byte_order: str = ">"):
+        self.structure_id = structure.id
+        self.name = structure.name
+        self.byte_order = "little" if byte_order == "<" else "big"
+        # Distinct payload words, shared by bit fields of the same word
+        word_index = {}
+        self.words = []
+        self.fields = []
+        for f in structure.fields:
+            kind = _field_kind(f.type)
+            size = f.size
+            if kind == "float" and size in _FLOAT_CODES:
+                code = _FLOAT_CODES[size]
+            elif size in _INT_CODES:
+                # Bit fields are extracted from the unsigned word and sign extended
+                code = _INT_CODES[size][0 if kind == "signed" and f.bitfield is None else 1]
+            else:
+                code = f"{size}s"
+            key = (f.offset, size, code)
+            if key not in word_index:
+                word_index[key] = len(self.words)
+                self.words.append(key)
+            shift = None
+            mask = None
+            if f.bitfield is not None and kind != "float":
+                shift = f.low_bit
+                mask = (1 << (f.high_bit - f.low_bit + 1)) - 1
+            enums = None if f.enums is None else {v: e.definition for v, e in f.enums.items()}
+            self.fields.append((f.name, word_index[key], shift, mask, kind, enums, code.endswith("s")))
+
+        # Greedy interval coloring, each group of words is unpacked with a single struct
+        groups = []
+        for index in sorted(range(len(self.words)), key=lambda i: self.words[i][0]):
+            offset, size, _code = self.words[index]
+            for group in groups:
+                if group[-1][1] <= offset:
+                    group.append((offset, offset + size, index))
+                    break
+            else:
+                groups.append([(offset, offset + size, index)])
+        self.groups = []
+        for group in groups:
+            start = group[0][0]
+            fmt = byte_order
+            position = start
+            for offset, end, index in group:
+                if offset > position:
+                    fmt += f"{offset - position}x"
+                fmt += self.words[index][2]
+                position = end
+            # Single word structs decode what fits in a short payload
+            single = [(struct.Struct(byte_order + self.words[i][2]), o, i) for o, _e, i in group]
+            self.groups.append((struct.Struct(fmt), start, [i for _o, _e, i in group], single))
+        # Structured dtype of the payload, compiled on first use by columns()
+        self.dtype = None
+
+    def payload_dtype(self):
+        """Structured NumPy dtype with one, possibly overlapping, field per payload word."""
+        if self.dtype is None:
+            order = "<" if self.byte_order == "little" else ">"
+            formats = []
+            for _offset, size, code in self.words:
+                formats.append(("u1", (size,)) if code.endswith("s") else order + _NUMPY_TYPES[code])
+            self.dtype = np.dtype({
+                "names": [f"w{i}" for i in range(len(self.words))],
+                "formats": formats,
+                "offsets": [w[0] for w in self.words],
+                "itemsize": max((w[0] + w[1] for w in self.words), default=0),
+            })
+        return self.dtype
+
+    def columns(self, payloads, lengths):
+        """
+        Decode a matrix of payloads, one row per frame, into one array per field.
+        Values beyond the payload length of a frame are masked.
+        """
+        words = payloads.view(self.payload_dtype()).reshape(len(payloads))
+        values = {}
+        for name, index, shift, mask, kind, _enums, raw in self.fields:
+            offset, size, _code = self.words[index]
+            column = words[f"w{index}"]
+            if raw and mask is not None and size <= 8:
+                # Assemble odd sized words into integers
+                shifts = np.arange(size, dtype=np.uint64) * np.uint64(8)
+                if self.byte_order == "big":
+                    shifts = shifts[::-1]
+                column = (column.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+            if mask is not None and column.ndim == 1:
+                column = (column >> shift) & mask
+                # Sign extend signed bit fields
+                if kind == "signed":
+                    column = column.astype(np.int64)
+                    column = np.where(column > (mask >> 1), column - (mask + 1), column)
+            if kind == "bool":
+                column = column.astype(bool)
+            short = lengths < offset + size
+            if column.ndim > 1:
+                short = np.broadcast_to(short[:, None], column.shape)
+            values[name] = np.ma.masked_array(column, mask=short)
+        return values
+
+    def enums(self):
+        """Retrieve the enum definitions of the enumerated fields by field name."""
+        return {f[0]: f[5] for f in self.fields if f[5] is not None}
+
+    def decode(self, payload):
+        """Decode a payload buffer into a dictionary of field names and values."""
+        words = [None] * len(self.words)
+        length = len(payload)
+        for group_struct, start, indexes, single in self.groups:
+            if start + group_struct.size <= length:
+                for index, value in zip(indexes, group_struct.unpack_from(payload, start)):
+                    words[index] = value
+            else:
+                # Truncated payload, fields beyond its end stay None
+                for word_struct, offset, index in single:
+                    if offset + word_struct.size <= length:
+                        words[index] = word_struct.unpack_from(payload, offset)[0]
+
+        values = {}
+        for name, index, shift, mask, kind, enums, raw in self.fields:
+            value = words[index]
+            if value is not None:
+                if raw:
+                    value = int.from_bytes(value, self.byte_order) \
+                        if mask is not None else bytes(value)
+                if mask is not None:
+                    value = (value >> shift) & mask
+                    # Sign extend signed bit fields
+                    if kind == "signed" and value > (mask >> 1):
+                        value -= mask + 1
+                if kind == "bool":
+                    value = bool(value)
+                elif enums is not None:
+                    value = enums.get(value, value)
+            values[name] = value
+        return values
+
+
+class ImtApexDecoder:
+    """
+    Decoder of IMT APEX frames driven by a GILDA database.
+    The header channel selects the data structure, its fields are decoded from the payload.
+    """
+
+    def __init__(self, database_path: str, byte_order: str = ">"):
+        self.byte_order = byte_order
+        self.header = struct.Struct(byte_order + _HEADER_FORMAT)
+        self.length = struct.Struct(byte_order + "H")
+        # The shared database model is loaded once, frames cost no SQL
+        self.model = load_model(database_path)
+        # Decode plans are compiled on first use of a structure
+        self.plans = {}
+
+    def plan(self, channel: int):
+        """Retrieve the cached decode plan of a channel, None for unknown channels."""
+        plan = self.plans.get(channel)
+        if plan is None and channel in self.model.structures_by_channel:
+            plan = DecodePlan(self.model.structures_by_channel[channel], self.byte_order)
+            self.plans[channel] = plan
+        return plan
+
+    def decode_header(self, frame):
+        """Decode the header of a frame into a dictionary of header field names and values."""
+        return dict(zip((f.name for f in ImtApexHeaderFields), self.header.unpack_from(frame, 0)))
+
+    def decode(self, frame):
+        """
+        Decode a frame, returns the header fields, the structure name and the decoded fields.
+        Structure and fields are None when the channel is not linked to a data structure.
+        """
+        frame = memoryview(frame)
+        header = self.decode_header(frame)
+        payload = frame[IMT_APEX_HEADER_SIZE:IMT_APEX_HEADER_SIZE + header["Length"]]
+        plan = self.plan(header["Channel"])
+        if plan is None:
+            return {"header": header, "structure": None, "fields": None}
+        return {"header": header, "structure": plan.name, "fields": plan.decode(payload)}
+
+    def frames(self, buffer):
+        """Split a buffer of consecutive frames, a trailing incomplete frame is ignored."""
+        buffer = memoryview(buffer)
+        position = 0
+        length_offset = ImtApexHeaderFields.Length.value
+        while position + IMT_APEX_HEADER_SIZE <= len(buffer):
+            end = position + IMT_APEX_HEADER_SIZE + self.length.unpack_from(buffer, position + length_offset)[0]
+            if end > len(buffer):
+                break
+            yield buffer[position:end]
+            position = end
+
+    def index_frames(self, buffer):
+        """Return the start offsets of all complete frames in a buffer, a trailing incomplete frame is ignored."""
+        starts = array("q")
+        end = len(buffer)
+        position = 0
+        high, low = (15, 16) if self.byte_order in ">!" else (16, 15)
+        # Each start depends on the previous length, this is the only loop over frames
+        while position + IMT_APEX_HEADER_SIZE <= end:
+            next_position = position + IMT_APEX_HEADER_SIZE + (buffer[position + high] << 8 | buffer[position + low])
+            if next_position > end:
+                break
+            starts.append(position)
+            position = next_position
+        return np.frombuffer(starts, dtype=np.int64)
+
+    def decode_capture(self, path: str):
+        """
+        Decode a capture file of consecutive frames into columns, grouped by channel.
+        Returns a dictionary of channels with the structure name, frame numbers, header and field columns.
+        Enumerated fields hold their raw values, the definitions are given in "enums".
+        """
+        if np is None:
+            raise ImportError("Decoding capture files requires NumPy.")
+        order = "<" if self.byte_order == "<" else ">"
+        header_dtype = np.dtype({
+            "names": [f.name for f in ImtApexHeaderFields],
+            "formats": [order + _NUMPY_TYPES[c] for c in _HEADER_FORMAT],
+            "offsets": [f.value for f in ImtApexHeaderFields],
+            "itemsize": IMT_APEX_HEADER_SIZE,
+        })
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = np.frombuffer(mm, dtype=np.uint8)
+            starts = self.index_frames(mm)
+            headers = data[starts[:, None] + np.arange(IMT_APEX_HEADER_SIZE)].view(header_dtype).reshape(len(starts))
+
+            # Group frames by channel, frame numbers stay ascending within a group
+            frame_order = np.argsort(headers["Channel"], kind="stable")
+            channels, first = np.unique(headers["Channel"][frame_order], return_index=True)
+            result = {}
+            for channel, frames in zip(channels.tolist(), np.split(frame_order, first[1:])):
+                group = headers[frames]
+                plan = self.plan(channel)
+                columns = {
+                    "structure": None if plan is None else plan.name,
+                    "frames": frames,
+                    "header": {name: group[name] for name in header_dtype.names},
+                    "fields": None,
+                    "enums": None,
+                }
+                if plan is not None and len(plan.words) == 0:
+                    columns["fields"] = {}
+                    columns["enums"] = {}
+                elif plan is not None:
+                    lengths = group["Length"].astype(np.int64)
+                    size = plan.payload_dtype().itemsize
+                    # Gather payload bytes of all frames at once, reads beyond the file are clipped and masked
+                    index = (starts[frames] + IMT_APEX_HEADER_SIZE)[:, None] + np.arange(size)
+                    payloads = data[np.minimum(index, len(data) - 1)]
+                    columns["fields"] = plan.columns(payloads, lengths)
+                    columns["enums"] = plan.enums()
+                result[channel] = columns
+            del data
+        return result
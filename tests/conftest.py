@@ -0,0 +1,49 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+GILDA_PARSER = ROOT / "gilda_parser.py"
+EXPORT_GENERATOR = ROOT / "benchmark" / "gilda_export_generator.py"
+
+
+def run_parser(*args):
+    """Run gilda_parser.py and return the completed process."""
+    return subprocess.run([sys.executable, GILDA_PARSER, *map(str, args)], capture_output=True, text=True)
+
+
+@pytest.fixture(scope="session")
+def export(tmp_path_factory):
+    """Small synthetic GILDA export with one ARINC bus shared by several FIFO fields."""
+    path = tmp_path_factory.mktemp("export")
+    subprocess.run([sys.executable, EXPORT_GENERATOR, path, "--files", "2", "--structures", "3", "--fields", "8",
+                    "--fido", "1", "--labels", "2"], check=True, capture_output=True)
+    return path
+
+
+@pytest.fixture(scope="session")
+def database(export, tmp_path_factory):
+    """Database imported from the synthetic export, including its ARINC definitions."""
+    path = tmp_path_factory.mktemp("database") / "gilda.sqlite"
+    assert run_parser("--create", path).returncode == 0
+    assert run_parser("-s", "-a", "ARINC.conf", export, path).returncode == 0
+    return path
@@ -0,0 +1,39 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+from arinc429 import REVERSED_BITS, ArincDecoder
+
+
+def label_word(label: int) -> int:
+    """Return a word carrying a label given as octal digits, bit reversed like on the bus."""
+    return REVERSED_BITS[int(str(label), 8)]
+
+
+def test_decode_by_bus_name(database):
+    decoder = ArincDecoder(str(database))
+    # Label 100 is the first generated label of BUS_00, its BNR parameter starts at bit 11
+    result = decoder.decode(label_word(100) | (8 << 10), "BUS_00")
+    assert result is not None
+    assert result["label"] == 100
+    assert result["parameters"]["BUS_00_P000"] == 1.0
+    assert result["parameters"]["BUS_00_D000"] == "STATE_0"
+
+
+def test_decode_batch_by_bus_name(database):
+    decoder = ArincDecoder(str(database))
+    labels = decoder.decode_batch([label_word(100), label_word(101)], "BUS_00")
+    assert sorted(labels) == [100, 101]
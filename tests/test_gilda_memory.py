@@ -0,0 +1,55 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import subprocess
+import sys
+
+from conftest import EXPORT_GENERATOR, run_parser
+from database import Database
+from gilda_memory import MemoryBudget
+from gilda_xml import GildaXml
+
+STRUCTURES = 60
+
+
+def test_budget_does_not_flush_every_structure(tmp_path):
+    export = tmp_path / "export"
+    subprocess.run([sys.executable, EXPORT_GENERATOR, export, "--files", "1", "--structures", str(STRUCTURES),
+                    "--fields", "20", "--fido", "0"], check=True, capture_output=True)
+    output = tmp_path / "gilda.sqlite"
+    assert run_parser("--create", output).returncode == 0
+
+    # 1 MB is far below the resident set size of the interpreter, the queued rows still bound the writes
+    budget = MemoryBudget(1)
+    with Database(str(output)) as db:
+        db.memory_budget = budget
+        flushes = []
+        flush = db.flush
+
+        def counted_flush():
+            flushes.append(len(db.field_rows) + len(db.enum_rows))
+            flush()
+
+        db.flush = counted_flush
+        with GildaXml(db, structures=True) as xml:
+            assert xml.parse(str(export / "GILDA_0000.xml"))
+        fields = db.cursor.execute("SELECT COUNT(*) FROM ParameterFields;").fetchone()[0]
+
+    assert fields == STRUCTURES * 20
+    assert budget.exceeded_count > 0
+    # Several structures are written per flush, not one flush per structure
+    assert len([rows for rows in flushes if rows > 0]) < STRUCTURES / 4
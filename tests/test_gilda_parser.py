@@ -0,0 +1,73 @@
+# This file is part of the GILDA parser.
+#
+# Copyright (c) 2025 Michael Wolf <michael@mictronics.de>
+#
+# GILDA parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# GILDA parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GILDA parser. If not, see http://www.gnu.org/licenses/.
+#
+import sqlite3
+
+import pytest
+from conftest import run_parser
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_import_into_missing_database(export, tmp_path, atomic):
+    output = tmp_path / "missing.sqlite"
+    result = run_parser("-s", *(["--atomic"] if atomic else []), export, output)
+    assert result.returncode == 1
+    assert "run with --create first" in result.stdout
+    # Nothing is created, also no temporary copy
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_import_into_empty_database(export, tmp_path, atomic):
+    output = tmp_path / "empty.sqlite"
+    output.touch()
+    result = run_parser("-s", *(["--atomic"] if atomic else []), export, output)
+    assert result.returncode == 1
+    assert "run with --create first" in result.stdout
+    assert output.stat().st_size == 0
+    assert list(tmp_path.iterdir()) == [output]
+
+
+def test_import_into_created_database(export, tmp_path):
+    output = tmp_path / "gilda.sqlite"
+    assert run_parser("--create", output).returncode == 0
+    result = run_parser("-s", export, output)
+    assert result.returncode == 0
+    with sqlite3.connect(output) as db:
+        assert db.execute("SELECT COUNT(*) FROM DataStructures;").fetchone()[0] == 6
+
+
+@pytest.mark.parametrize("option", [[], ["-b"]])
+def test_fk_check_file_rolls_back_failed_files(export, tmp_path, option):
+    output = tmp_path / "gilda.sqlite"
+    assert run_parser("--create", output).returncode == 0
+    # An orphaned structure makes the foreign key check of every XML file fail
+    with sqlite3.connect(output) as db:
+        db.execute("INSERT INTO DataStructures (EngName, SourcePartition) VALUES ('ORPHAN', 9999);")
+    result = run_parser("-s", "--fk-check", "file", *option, export, output)
+    assert "Error in foreign key relation!" in result.stdout
+    with sqlite3.connect(output) as db:
+        assert db.execute("SELECT EngName FROM DataStructures;").fetchall() == [("ORPHAN",)]
+        assert db.execute("SELECT COUNT(*) FROM ParameterFields;").fetchone()[0] == 0
+
+
+def test_fk_check_file_rejects_checkpoint(export, tmp_path):
+    output = tmp_path / "gilda.sqlite"
+    assert run_parser("--create", output).returncode == 0
+    result = run_parser("-s", "--fk-check", "file", "--checkpoint", "100", export, output)
+    assert result.returncode == 1
+    assert "can not be combined with --checkpoint" in result.stdout